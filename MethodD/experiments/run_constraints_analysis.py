@@ -16,6 +16,10 @@ from src.data.constraints_filter import (
     BorrowRateFilter,
     ConstraintsAnalyzer,
 )
+from src.data.sim_panel_loader import load_universe_tickers
+
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "outputs")
 
 
 def main():
@@ -110,6 +114,22 @@ def main():
     )
     print()
 
+    # 第五步：全标的批量约束分析
+    print("【第五步】全标的批量约束分析")
+    print("-" * 80)
+
+    universe = load_universe_tickers()
+    universe_df = ConstraintsAnalyzer.analyze_universe(universe, start_date, end_date)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    universe_path = os.path.join(OUTPUT_DIR, "constraints_universe.csv")
+    universe_df.to_csv(universe_path, index=False)
+
+    print(f"标的数量: {len(universe_df)}")
+    print(f"含财报窗口的标的: {int((universe_df['filtered_days'] > 0).sum())}")
+    print(f"适合做空的标的: {int(universe_df['eligible_for_short'].sum())}")
+    print(f"结果表: {universe_path}")
+    print()
+
     print("=" * 80)
     print("分析完成！")
     print("=" * 80)
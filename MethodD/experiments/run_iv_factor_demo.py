@@ -16,6 +16,12 @@ from src.data.data_adapter import DataAdapter, DataValidator
 from src.factor.factor_definition import IVFactorDefinition, FactorBucketizer
 from src.signal.signal_policy import SignalPolicy, SignalProcessor
 from src.backtest.backtest_runner import BacktestRunner
+from src.data.sim_panel_loader import (
+    DEFAULT_VERSION,
+    load_sim_option_premiums,
+    load_sim_panel,
+    load_universe_meta,
+)
 from src.eval.metrics import FactorMetrics, StrategyMetrics
 
 
@@ -43,6 +49,45 @@ def generate_synthetic_data(n_days: int = 252, n_stocks: int = 10):
     return prices, iv_data, future_returns
 
 
+def run_sim_premium_overlay(
+    backtest_runner: BacktestRunner,
+    n_tickers: int = 10,
+    tenor_days: int = 7,
+    version: str = DEFAULT_VERSION,
+):
+    """
+    模拟数据集上的期权叠加：开仓权利金取 options 分区的报价，而非按 IV 现算
+
+    数据集由 scripts/generate_sim_data.py 生成，缺失时返回 None
+    """
+    try:
+        tickers = load_universe_meta(version)["ticker"].head(n_tickers).tolist()
+        prices = load_sim_panel("prices", "close", version, tickers)
+        iv_data = load_sim_panel("iv", "iv", version, tickers)
+        call_premiums, put_premiums = load_sim_option_premiums(
+            tenor_days, version, tickers
+        )
+    except FileNotFoundError as exc:
+        print(f"  跳过：{exc}")
+        return None
+
+    factor_a = IVFactorDefinition.compute_factor_panel(iv_data, window=10)["factor_a"]
+    signals = pd.DataFrame(index=factor_a.index)
+    for col in factor_a.columns:
+        signals[col] = SignalPolicy.threshold_strategy(
+            factor_a[col], long_threshold=-0.15, short_threshold=0.15
+        )
+    return backtest_runner.run_option_overlay_backtest(
+        prices,
+        signals,
+        iv_data,
+        holding_period=5,
+        tenor_days=tenor_days,
+        call_premiums=call_premiums,
+        put_premiums=put_premiums,
+    )
+
+
 def main():
     """主演示函数"""
     print("=" * 80)
@@ -58,16 +103,9 @@ def main():
 
     # 第二步：计算因子
     print("【第二步】计算 IV 因子...")
-    factor_a = pd.DataFrame(index=iv_data.index)
-    factor_b = pd.DataFrame(index=iv_data.index)
-
-    for col in iv_data.columns:
-        factor_a[col] = IVFactorDefinition.compute_factor_version_a(
-            iv_data[col], window=10
-        )
-        factor_b[col] = IVFactorDefinition.compute_factor_version_b(
-            iv_data[col], window=10
-        )
+    factors = IVFactorDefinition.compute_factor_panel(iv_data, window=10)
+    factor_a = factors["factor_a"]
+    factor_b = factors["factor_b"]
 
     print(f"✓ 计算了 Version A（简单标准化）和 Version B（MAD 标准化）")
     print(
@@ -166,12 +204,42 @@ def main():
 
     # 不同持有期的对比
     print("不同持有期的影响:")
-    for holding_period in [3, 5, 7, 10]:
-        result = backtest_runner.run_backtest(
-            prices, signals_threshold, holding_period=holding_period
+    grid = backtest_runner.run_backtest_grid(
+        prices,
+        signals_threshold,
+        holding_periods=[3, 5, 7, 10],
+        transaction_costs=[0.0, 0.001, 0.002],
+    )
+    base = grid[grid["transaction_cost"] == backtest_runner.transaction_cost]
+    for _, row in base.iterrows():
+        print(
+            f"  持有期 {int(row['holding_period'])} 天: 总收益 {row['total_return']:.2%}, 夏普比率 {row['sharpe_ratio']:.4f}"
         )
+    print()
+
+    print("交易成本敏感性（夏普比率）:")
+    sharpe_table = grid.pivot(
+        index="holding_period", columns="transaction_cost", values="sharpe_ratio"
+    )
+    print(sharpe_table.round(4).to_string())
+    print()
+
+    print("期权叠加（做多正股+卖出平值call / 做空正股+买入平值put）:")
+    overlay = backtest_runner.run_option_overlay_backtest(
+        prices, signals_threshold, iv_data, holding_period=5, tenor_days=7
+    )
+    print(
+        f"  总收益 {overlay['total_return']:.2%}, 夏普比率 {overlay['sharpe_ratio']:.4f}, "
+        f"最大回撤 {overlay['max_drawdown']:.2%}, 交易次数 {overlay['num_trades']}"
+    )
+    print()
+
+    print("期权叠加（模拟数据集，options 分区报价权利金）:")
+    sim_overlay = run_sim_premium_overlay(backtest_runner)
+    if sim_overlay is not None:
         print(
-            f"  持有期 {holding_period} 天: 总收益 {result['total_return']:.2%}, 夏普比率 {result['sharpe_ratio']:.4f}"
+            f"  总收益 {sim_overlay['total_return']:.2%}, 夏普比率 {sim_overlay['sharpe_ratio']:.4f}, "
+            f"最大回撤 {sim_overlay['max_drawdown']:.2%}, 交易次数 {sim_overlay['num_trades']}"
         )
     print()
 
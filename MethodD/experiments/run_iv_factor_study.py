@@ -6,8 +6,9 @@ import os
 import sys
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
 
@@ -19,16 +20,13 @@ from src.data.snapshot_store import (
     list_run_manifests,
 )
 from src.data.real_data_loader import load_snapshot
+from src.pricing.binomial_pricer import CRRBinomialOption
+from src.pricing.implied_vol import year_fraction_to_expiry
+from src.pricing.vol_surface import VolSurface, load_or_build_surface
 from src.factor.factor_definition import IVFactorDefinition
-from src.factor.price_factors import (
-    compute_atr,
-    compute_bollinger,
-    compute_bb_midline_break,
-    compute_ma200_break,
-    compute_macd_cross_fast_slope,
-    compute_macd_hist,
-)
+from src.factor.price_factors import compute_indicator_table, lookup_indicators
 from src.eval.metrics import FactorMetrics
+from src.signal.gate_sweep import build_threshold_grid, sweep_triple_gate
 from src.signal.signal_policy import (
     TripleGateConfig,
     apply_triple_gate_signals,
@@ -45,6 +43,7 @@ MIN_OPEN_INTEREST = 1
 MIN_TRADABLE_PRICE = 0.01
 DEFAULT_BOOTSTRAP = 500
 HISTORY_LOOKBACK_DAYS = 400
+RISK_FREE_RATE = 0.02
 TRIPLE_GATE_CONFIG = TripleGateConfig(
     iv_thr=0.15,
     ma_thr=1.0,
@@ -52,6 +51,9 @@ TRIPLE_GATE_CONFIG = TripleGateConfig(
     bb_bw_thr=0.04,
     use_bb_bw_filter=False,
 )
+SWEEP_IV_THRS = np.round(np.arange(0.0, 0.41, 0.025), 4)
+SWEEP_MA_THRS = np.round(np.arange(0.0, 3.01, 0.25), 4)
+SWEEP_BB_BW_THRS = np.round(np.arange(0.0, 0.101, 0.01), 4)
 
 
 def _ensure_output_dir() -> None:
@@ -200,13 +202,16 @@ def _parse_timestamp(ts_value: object) -> Optional[pd.Timestamp]:
         return None
 
 
-def _download_price_history(ticker: str, end_ts: object) -> Optional[pd.DataFrame]:
+def _download_price_history(
+    ticker: str, end_ts: object, start_ts: object = None
+) -> Optional[pd.DataFrame]:
     if not ticker:
         return None
     end_dt = _parse_timestamp(end_ts)
     if end_dt is None:
         return None
-    start_dt = end_dt - timedelta(days=HISTORY_LOOKBACK_DAYS)
+    start_dt = _parse_timestamp(start_ts) or end_dt
+    start_dt = start_dt - timedelta(days=HISTORY_LOOKBACK_DAYS)
     history = yf.download(
         ticker,
         start=start_dt.strftime("%Y-%m-%d"),
@@ -225,43 +230,99 @@ def _download_price_history(ticker: str, end_ts: object) -> Optional[pd.DataFram
     return history
 
 
-def _compute_price_factors(
-    history: pd.DataFrame,
-) -> Tuple[float, float, float, float, int, float, int, int]:
-    if history is None or history.empty:
-        return (
-            float("nan"),
-            float("nan"),
-            float("nan"),
-            float("nan"),
-            0,
-            float("nan"),
-            0,
-            0,
+def _download_histories(
+    manifests: List[Dict[str, object]],
+) -> Dict[str, Optional[pd.DataFrame]]:
+    """每个标的只下载一次覆盖全部 run（含各自回看窗口）的日线"""
+    timestamps: Dict[str, List[pd.Timestamp]] = {}
+    for manifest in manifests:
+        ticker = manifest.get("ticker")
+        ts = _parse_timestamp(
+            manifest.get("captured_at_t0_utc") or manifest.get("created_at")
+        )
+        if ticker and ts is not None:
+            timestamps.setdefault(ticker, []).append(ts)
+
+    # 快照时间戳可能早于 / 晚于 manifest 记录时间，两端各留出余量
+    return {
+        ticker: _download_price_history(
+            ticker, max(values) + timedelta(days=7), min(values) - timedelta(days=7)
         )
-    close = history["Close"]
-    high = history["High"] if "High" in history.columns else None
-    low = history["Low"] if "Low" in history.columns else None
-    bb_pos, bb_bw = compute_bollinger(close)
-    bb_mid_flag, bb_mid_side = compute_bb_midline_break(close)
-    atr = compute_atr(high, low, close)
-    ma200_break = compute_ma200_break(close, atr)
-    macd_hist = compute_macd_hist(close)
-    macd_cross_flag, macd_fast_slope = compute_macd_cross_fast_slope(close)
-    return (
-        bb_pos,
-        bb_bw,
-        ma200_break,
-        macd_hist,
-        macd_cross_flag,
-        macd_fast_slope,
-        bb_mid_flag,
-        bb_mid_side,
+        for ticker, values in timestamps.items()
+    }
+
+
+def _indicators_as_of(
+    history: Optional[pd.DataFrame],
+    as_of: Optional[pd.Timestamp],
+    cache: Dict[object, Dict[str, object]],
+    ticker: object,
+) -> Dict[str, object]:
+    """
+    t0 的价格指标，回看窗口固定为 [t0 - HISTORY_LOOKBACK_DAYS, t0 当天]
+
+    与逐 run 下载的口径一致：EMA 预热长度不随样本里最早的 run 变化。
+    同一标的同一 t0 日期的结果缓存复用
+    """
+    if history is None or as_of is None:
+        return lookup_indicators(None, as_of)
+    day = pd.Timestamp(as_of.strftime("%Y-%m-%d"))
+    key = (ticker, day)
+    if key not in cache:
+        dates = pd.to_datetime(history["Date"])
+        window = history[
+            (dates >= day - timedelta(days=HISTORY_LOOKBACK_DAYS))
+            & (dates < day + timedelta(days=1))
+        ]
+        table = compute_indicator_table(window) if not window.empty else None
+        cache[key] = lookup_indicators(table, day)
+    return dict(cache[key])
+
+
+def _american_model_prices(
+    merged: pd.DataFrame, spot: float, timestamp: object
+) -> np.ndarray:
+    """整条合并链一次性做 CRR 美式定价（IV 缺失的合约为 NaN）"""
+    if merged.empty or _parse_timestamp(timestamp) is None:
+        return np.full(len(merged), np.nan)
+    iv = pd.to_numeric(merged["iv_t0"], errors="coerce").to_numpy(dtype=float)
+    prices = CRRBinomialOption.price_batch(
+        S=spot,
+        K=pd.to_numeric(merged["strike_t0"], errors="coerce").to_numpy(dtype=float),
+        T=year_fraction_to_expiry(merged["expiry_t0"], timestamp),
+        r=RISK_FREE_RATE,
+        sigma=iv,
+        option_type=merged["optionType_t0"].astype(str).to_numpy(),
+    )["price"]
+    return np.where(np.isfinite(iv) & (iv > 0), prices, np.nan)
+
+
+def _load_run_surface(paths: List[str]) -> Optional[VolSurface]:
+    """按 run 的 t0 快照构建（或读取缓存的）IV 曲面，失败返回 None"""
+    if not paths:
+        return None
+    try:
+        return load_or_build_surface(sorted(set(paths)), r=RISK_FREE_RATE)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _surface_iv(
+    surface: Optional[VolSurface], merged: pd.DataFrame, timestamp: object
+) -> np.ndarray:
+    """在 t0 曲面上批量查询合并链各合约的平滑 IV"""
+    if surface is None or merged.empty or _parse_timestamp(timestamp) is None:
+        return np.full(len(merged), np.nan)
+    return surface.iv_at(
+        pd.to_numeric(merged["strike_t0"], errors="coerce").to_numpy(dtype=float),
+        year_fraction_to_expiry(merged["expiry_t0"], timestamp),
     )
 
 
 def build_sample_table() -> pd.DataFrame:
     manifests = _collect_manifests()
+    histories = _download_histories(manifests)
+    indicator_cache: Dict[object, Dict[str, object]] = {}
     rows = []
     for manifest in manifests:
         snapshots = manifest.get("snapshots", {})
@@ -293,6 +354,7 @@ def build_sample_table() -> pd.DataFrame:
             )
         if not expiry_keys:
             expiry_keys = [None]
+        t0_surface = _load_run_surface(list(t0_map.values()))
 
         for expiry_key in expiry_keys:
             t0_path = t0_map.get(expiry_key) or t0_map.get(None)
@@ -308,20 +370,20 @@ def build_sample_table() -> pd.DataFrame:
             if "chain" not in t0_snapshot or "chain" not in t5_snapshot:
                 continue
 
-            price_history = _download_price_history(
+            indicators = _indicators_as_of(
+                histories.get(manifest.get("ticker")),
+                _parse_timestamp(t0_snapshot.get("timestamp")),
+                indicator_cache,
                 manifest.get("ticker"),
-                t0_snapshot.get("timestamp"),
             )
-            (
-                bb_pos,
-                bb_bw,
-                ma200_break,
-                macd_hist,
-                macd_cross_flag,
-                macd_fast_slope,
-                bb_mid_flag,
-                bb_mid_side,
-            ) = _compute_price_factors(price_history)
+            bb_pos = indicators["bb_pos"]
+            bb_bw = indicators["bb_bw"]
+            ma200_break = indicators["ma200_break"]
+            macd_hist = indicators["macd_hist"]
+            macd_cross_flag = indicators["macd_cross_flag"]
+            macd_fast_slope = indicators["macd_fast_slope"]
+            bb_mid_flag = indicators["bb_mid_flag"]
+            bb_mid_side = indicators["bb_mid_side"]
 
             t0_chain = _filter_chain_by_expiry(t0_snapshot["chain"], expiry_key)
             t5_chain = _filter_chain_by_expiry(t5_snapshot["chain"], expiry_key)
@@ -339,7 +401,14 @@ def build_sample_table() -> pd.DataFrame:
             if merged.empty:
                 continue
 
-            for _, row in merged.iterrows():
+            model_prices_t0 = _american_model_prices(
+                merged, float(t0_snapshot.get("spot")), t0_snapshot.get("timestamp")
+            )
+            surface_iv_t0 = _surface_iv(
+                t0_surface, merged, t0_snapshot.get("timestamp")
+            )
+
+            for position, (_, row) in enumerate(merged.iterrows()):
                 if (
                     "expiry_t0" in row
                     and "expiry_t5" in row
@@ -384,6 +453,7 @@ def build_sample_table() -> pd.DataFrame:
                     "moneyness_t0": None if strike is None else float(strike) / spot_t0,
                     "iv_t0": iv_t0,
                     "iv_t5": iv_t5,
+                    "iv_surface_t0": surface_iv_t0[position],
                     "iv_change": None
                     if iv_t0 is None or iv_t5 is None
                     else float(iv_t5) - float(iv_t0),
@@ -397,6 +467,7 @@ def build_sample_table() -> pd.DataFrame:
                     "price_source_t0": t0_mid["price_source"],
                     "price_used_t5": t5_mid["price_used"],
                     "price_source_t5": t5_mid["price_source"],
+                    "model_price_american_t0": model_prices_t0[position],
                     "spread_t0": _calc_spread(row.get("bid_t0"), row.get("ask_t0")),
                     "spread_t5": _calc_spread(row.get("bid_t5"), row.get("ask_t5")),
                     "open_interest_t0": row.get("openInterest_t0"),
@@ -515,6 +586,38 @@ def _attach_triple_gate_signals(sample_df: pd.DataFrame) -> pd.DataFrame:
     return merged
 
 
+def build_gate_sweep_table(sample_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    三重门控阈值网格扫描（run 级）
+
+    run 的 iv_change 取其合约样本的均值，可交易指 run 内任一合约 is_tradable
+    """
+    if sample_df.empty:
+        return pd.DataFrame()
+    feature_cols = [
+        "iv_signal",
+        "ma200_break_t0",
+        "bb_bw_t0",
+        "macd_cross_flag",
+        "bb_midline_break_flag",
+        "bb_break_side",
+        "spot_return_5d",
+    ]
+    grouped = sample_df.groupby("run_id", sort=False)
+    run_df = grouped[feature_cols].first()
+    run_df["iv_change"] = grouped["iv_change"].mean()
+    run_df["is_tradable"] = grouped["is_tradable"].agg(lambda s: (s == True).any())
+    run_df = run_df.reset_index()
+
+    unfiltered = sweep_triple_gate(
+        run_df, build_threshold_grid(SWEEP_IV_THRS, SWEEP_MA_THRS)
+    )
+    filtered = sweep_triple_gate(
+        run_df, build_threshold_grid(SWEEP_IV_THRS, SWEEP_MA_THRS, SWEEP_BB_BW_THRS)
+    )
+    return pd.concat([unfiltered, filtered], ignore_index=True)
+
+
 def _make_group_labels(sample_df: pd.DataFrame) -> pd.Series:
     return sample_df["t0_timestamp"].astype(str) + "|" + sample_df["expiry"].astype(str)
 
@@ -743,11 +846,16 @@ def main() -> None:
     full_stats_path = os.path.join(OUTPUT_DIR, "stats_table_full.csv")
     full_stats_df.to_csv(full_stats_path, index=False)
 
+    sweep_df = build_gate_sweep_table(sample_df)
+    sweep_path = os.path.join(OUTPUT_DIR, "triple_gate_sweep.csv")
+    sweep_df.to_csv(sweep_path, index=False)
+
     print("=" * 80)
     print(f"样本表: {sample_path}")
     print(f"可交易样本表: {tradable_path}")
     print(f"统计表(主结论/可交易): {stats_path}")
     print(f"统计表(全量/附录): {full_stats_path}")
+    print(f"门控阈值扫描: {sweep_path}")
     print(f"样本量: {len(sample_df)} (可交易: {len(tradable_df)})")
     print("=" * 80)
 
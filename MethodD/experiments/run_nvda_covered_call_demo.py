@@ -13,6 +13,9 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 import pandas as pd
 
 from src.data.real_data_loader import fetch_nvda_option_chain, load_snapshot
+from src.pricing.binomial_pricer import CRRBinomialOption
+from src.pricing.covered_call_mc import MonteCarloConfig, simulate_covered_call_pnl
+from src.pricing.implied_vol import year_fraction_to_expiry
 from src.data.snapshot_store import (
     write_snapshot,
     write_manifest,
@@ -43,6 +46,10 @@ REQUIRED_MANIFEST_FIELDS = [
     "snapshots",
 ]
 
+RISK_FREE_RATE = 0.02
+MC_PATHS = 200_000
+MC_SEED = 0
+
 REQUIRED_CONTRACT_FIELDS = ["optionType", "expiry", "strike", "contractSymbol"]
 
 REQUIRED_CHAIN_COLUMNS = [
@@ -294,7 +301,44 @@ def _run_analysis(
         if pd.isna(iv_entry) or pd.isna(iv_exit):
             raise ValueError("IV 缺失")
 
+        # 标的为美式期权：用 CRR 二叉树给出 t0 模型价，便于与成交口径对照
+        t0_years = year_fraction_to_expiry(
+            contract_key["expiry"], t0_snapshot.get("timestamp")
+        )
+        model_price_t0 = float(
+            CRRBinomialOption.price_batch(
+                S=entry_price,
+                K=strike_price,
+                T=t0_years,
+                r=RISK_FREE_RATE,
+                sigma=float(iv_entry),
+                option_type=contract_key["optionType"],
+            )["price"][0]
+        )
+
         shares = 100
+        # t0 视角的 5 日 PnL 分布（与实际 t5 复算结果对照）；持有期按两次快照
+        # 之间的实际自然日数折年，与 T 同为 ACT/365
+        t5_years = year_fraction_to_expiry(
+            contract_key["expiry"], t5_snapshot.get("timestamp")
+        )
+        horizon_calendar_days = float(t0_years[0] - t5_years[0]) * 365
+        if not horizon_calendar_days > 0:
+            horizon_calendar_days = None
+        mc = simulate_covered_call_pnl(
+            entry_spot=entry_price,
+            strike=strike_price,
+            call_premium_received=option_open,
+            T=float(t0_years[0]),
+            iv_entry=float(iv_entry),
+            r=RISK_FREE_RATE,
+            shares=shares,
+            config=MonteCarloConfig(
+                n_paths=MC_PATHS,
+                seed=MC_SEED,
+                horizon_calendar_days=horizon_calendar_days,
+            ),
+        )
         stock_pnl = (exit_price - entry_price) * shares
         option_pnl = (option_open - option_close) * shares
         total_pnl = stock_pnl + option_pnl
@@ -332,6 +376,13 @@ def _run_analysis(
             "price_source_t5": price_source_t5,
             "iv_t0": iv_entry,
             "iv_t5": iv_exit,
+            "model_price_american_t0": model_price_t0,
+            "mc_pnl_mean": mc["mean_pnl_cv"],
+            "mc_pnl_p05": mc["quantiles"][0.05],
+            "mc_pnl_p50": mc["quantiles"][0.5],
+            "mc_pnl_p95": mc["quantiles"][0.95],
+            "mc_es_95": mc["expected_shortfall"],
+            "mc_prob_capped": mc["prob_capped"],
             "stock_pnl": stock_pnl,
             "option_pnl": option_pnl,
             "total_pnl": total_pnl,
@@ -4,7 +4,13 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Optional, Sequence, Tuple
+
+from src.pricing.bs_pricer import BlackScholesOption
+from src.pricing.scenario_engine import TRADING_DAYS_PER_YEAR
+
+
+DAY_NS = 86_400 * 10**9
 
 
 class BacktestRunner:
@@ -16,72 +22,401 @@ class BacktestRunner:
         self.initial_capital = initial_capital
         self.transaction_cost = transaction_cost
 
+    @staticmethod
+    def _to_arrays(
+        prices: pd.DataFrame, signals: pd.DataFrame
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        价格 / 信号转成矩阵（列为 signals 的标的，信号按行位置对齐价格）
+
+        返回:
+            Tuple: (价格矩阵, 信号矩阵, 纳秒时间戳)
+        """
+        price_matrix = prices[list(signals.columns)].to_numpy(dtype=float)
+        signal_matrix = signals.to_numpy()[: len(prices)]
+        stamps = pd.DatetimeIndex(prices.index).to_numpy().astype("datetime64[ns]")
+        return price_matrix, signal_matrix, stamps.astype(np.int64)
+
+    @staticmethod
+    def _option_value(
+        spot: np.ndarray,
+        strike: np.ndarray,
+        rows_left: np.ndarray,
+        r: float,
+        iv: np.ndarray,
+        side: np.ndarray,
+    ) -> np.ndarray:
+        """
+        期权腿的单位价值：做多正股对应 call，做空正股对应 put（剩余交易日 / 252 折年）
+
+        未到期而 IV 缺失（非有限值）时为 NaN，不回退为内在价值；到期后取内在价值
+        """
+        rows_left = np.maximum(rows_left, 0)
+        result = BlackScholesOption.batch_price_greeks(
+            spot,
+            strike,
+            rows_left / TRADING_DAYS_PER_YEAR,
+            r,
+            iv,
+            option_type=np.where(side > 0, "call", "put"),
+            include_greeks=False,
+        )
+        return np.where((rows_left > 0) & ~np.isfinite(iv), np.nan, result["price"])
+
+    @staticmethod
+    def _option_leg_value(
+        price_matrix: np.ndarray,
+        iv_matrix: np.ndarray,
+        row: int,
+        entry_row: np.ndarray,
+        strike: np.ndarray,
+        side: np.ndarray,
+        col: np.ndarray,
+        tenor: int,
+        r: float,
+    ) -> np.ndarray:
+        """
+        第 row 行时期权腿的价值
+
+        已过到期行（entry_row + tenor）的期权按到期行收盘价结算内在价值，
+        不再随之后的价格变动
+        """
+        expiry_row = entry_row + tenor
+        spot = price_matrix[np.minimum(row, expiry_row), col]
+        return BacktestRunner._option_value(
+            spot, strike, expiry_row - row, r, iv_matrix[row, col], side
+        )
+
+    @staticmethod
+    def _simulate(
+        price_matrix: np.ndarray,
+        signal_matrix: np.ndarray,
+        stamps: np.ndarray,
+        holding_periods: np.ndarray,
+        option_leg: Optional[Dict[str, object]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        所有持有期共用一次逐日扫描
+
+        头寸状态是（持有期 × 标的）数组（是否持仓 / 开仓行 / 开仓价 / 方向）；
+        新信号检测与价格行在持有期之间共享，到期平仓、开仓与盯市都是整块向量运算。
+        交易成本不影响持仓路径，因此这里只输出毛收益与计费金额，成本在汇总时按比例扣除
+
+        参数:
+            option_leg: 给出时每个头寸叠加一条 ATM 期权腿（做多正股 + 卖出 call，
+                做空正股 + 买入 put），键为 iv（IV 矩阵）/ tenor_days / r，以及可选的
+                call_premium / put_premium（开仓权利金矩阵，缺省时按 BS 定价）。
+                期权腿每天对全部持仓批量做一次 BS 重估，到期后按到期行收盘价的内在价值
+                固定；开仓日权利金无法确定
+                （IV 或报价缺失）的信号不开仓，持仓期间 IV 缺失时当日估值为 NaN
+
+        返回:
+            Dict: gross / notional 为（持有期 × 天）的持仓浮盈与持仓开仓金额；
+            charged 为持仓的计费金额（开仓金额 + 按当日价格平仓的金额）；
+            trade_* 为全部平仓记录（持有期下标、平仓行、开仓行、列、开仓价、平仓价、方向，
+            有期权腿时另含开仓权利金与平仓时期权价值）
+        """
+        n_days, n_symbols = price_matrix.shape
+        n_variants = len(holding_periods)
+        shape = (n_variants, n_symbols)
+        is_open = np.zeros(shape, dtype=bool)
+        entry_row = np.zeros(shape, dtype=np.int64)
+        entry_price = np.zeros(shape)
+        side = np.zeros(shape, dtype=signal_matrix.dtype)
+        horizon = np.asarray(holding_periods)[:, None]
+        if option_leg is not None:
+            iv_matrix = option_leg["iv"]
+            tenor = option_leg["tenor_days"]
+            r = option_leg["r"]
+            premium = np.zeros(shape)
+
+        gross = np.empty((n_variants, n_days))
+        notional = np.empty((n_variants, n_days))
+        charged = np.empty((n_variants, n_days))
+        closed = []
+
+        for i in range(n_days):
+            price_row = price_matrix[i]
+
+            # 与 Timedelta.days 一致：时间差向下取整到自然日
+            days_held = (stamps[i] - stamps[entry_row]) // DAY_NS
+            variant, col = np.nonzero(is_open & (days_held >= horizon))
+            if len(col):
+                record = [
+                    variant,
+                    np.full(len(col), i),
+                    entry_row[variant, col],
+                    col,
+                    entry_price[variant, col],
+                    price_row[col],
+                    side[variant, col],
+                ]
+                if option_leg is not None:
+                    exit_value = BacktestRunner._option_leg_value(
+                        price_matrix,
+                        iv_matrix,
+                        i,
+                        entry_row[variant, col],
+                        entry_price[variant, col],
+                        side[variant, col],
+                        col,
+                        tenor,
+                        r,
+                    )
+                    record += [premium[variant, col], exit_value]
+                closed.append(record)
+                is_open[variant, col] = False
+
+            if i < len(signal_matrix):
+                opening = (signal_matrix[i] != 0)[None, :] & ~is_open
+                if option_leg is not None and opening.any():
+                    variant, col = np.nonzero(opening)
+                    new_side = signal_matrix[i, col]
+                    quoted = option_leg.get("call_premium")
+                    if quoted is None:
+                        entry_premium = BacktestRunner._option_value(
+                            price_row[col],
+                            price_row[col],
+                            np.full(len(col), tenor),
+                            r,
+                            iv_matrix[i, col],
+                            new_side,
+                        )
+                    else:
+                        entry_premium = np.where(
+                            new_side > 0,
+                            quoted[i, col],
+                            option_leg["put_premium"][i, col],
+                        )
+                    # 开仓日 IV / 权利金缺失时无法给期权腿定价，跳过该信号
+                    priced = np.isfinite(entry_premium)
+                    opening[variant[~priced], col[~priced]] = False
+                    premium[variant[priced], col[priced]] = entry_premium[priced]
+                is_open |= opening
+                entry_row[opening] = i
+                entry_price = np.where(opening, price_row[None, :], entry_price)
+                side = np.where(opening, signal_matrix[i][None, :], side)
+
+            unrealized = np.where(is_open, (price_row - entry_price) * side, 0)
+            if option_leg is not None and is_open.any():
+                # 期权腿：卖出 call / 买入 put，盈亏为 -side × (当前价值 - 开仓权利金)
+                variant, col = np.nonzero(is_open)
+                value = BacktestRunner._option_leg_value(
+                    price_matrix,
+                    iv_matrix,
+                    i,
+                    entry_row[variant, col],
+                    entry_price[variant, col],
+                    side[variant, col],
+                    col,
+                    tenor,
+                    r,
+                )
+                unrealized[variant, col] -= side[variant, col] * (
+                    value - premium[variant, col]
+                )
+            gross[:, i] = unrealized.sum(axis=1)
+            notional[:, i] = np.where(is_open, entry_price * np.abs(side), 0).sum(
+                axis=1
+            )
+            charged[:, i] = notional[:, i] + np.where(
+                is_open, price_row * np.abs(side), 0
+            ).sum(axis=1)
+
+        names = ["variant", "exit_row", "entry_row", "col", "entry", "exit", "side"]
+        if option_leg is not None:
+            names += ["premium", "option_exit"]
+        if closed:
+            columns = [np.concatenate(parts) for parts in zip(*closed)]
+        else:
+            columns = [np.array([], dtype=np.int64)] * 4 + [np.array([])] * 2
+            columns.append(np.array([], dtype=signal_matrix.dtype))
+            columns += [np.array([])] * (len(names) - len(columns))
+        result = {"gross": gross, "notional": notional, "charged": charged}
+        result.update({f"trade_{name}": values for name, values in zip(names, columns)})
+        return result
+
     def run_backtest(
         self, prices: pd.DataFrame, signals: pd.DataFrame, holding_period: int = 5
     ) -> Dict:
         """
         运行回测
 
+        交易成本按成交金额的 transaction_cost 比例在开仓和平仓时各收一次：
+        已平仓交易的 pnl 为扣费后净值。组合净值与无成本时口径相同，只对当日持仓
+        盯市（平仓后的盈亏不再计入），持仓按“当日平仓”的扣费后净值计：扣除开仓成本
+        与按当日价格平仓的成本
+
         参数:
             prices: 股票价格 DataFrame
             signals: 交易信号 DataFrame
-            holding_period: 持有期
+            holding_period: 持有期（自然日）
 
         返回:
             Dict: 回测结果
         """
-        # 初始化
-        portfolio_value = [self.initial_capital]
-        positions = {}
+        price_matrix, signal_matrix, stamps = self._to_arrays(prices, signals)
+        sim = self._simulate(
+            price_matrix, signal_matrix, stamps, np.array([holding_period])
+        )
+        return self._single_result(prices, signals, sim)
+
+    def _single_result(
+        self, prices: pd.DataFrame, signals: pd.DataFrame, sim: Dict[str, np.ndarray]
+    ) -> Dict:
+        """单一持有期的模拟结果 -> 交易列表与回测指标"""
+        cost_rate = self.transaction_cost
+        with_option = "trade_premium" in sim
+
+        # 平仓顺序与开仓顺序一致：平仓日 -> 开仓日 -> 列
+        order = np.lexsort(
+            (sim["trade_col"], sim["trade_entry_row"], sim["trade_exit_row"])
+        )
+        entry = sim["trade_entry"][order]
+        exit_ = sim["trade_exit"][order]
+        side = sim["trade_side"][order]
+        pnl = (exit_ - entry) * side - cost_rate * (entry + exit_) * np.abs(side)
+        if with_option:
+            premium = sim["trade_premium"][order]
+            option_exit = sim["trade_option_exit"][order]
+            pnl = pnl - side * (option_exit - premium)
+        day_stamps = list(prices.index)
+        exit_dates = [day_stamps[row] for row in sim["trade_exit_row"][order]]
+        symbols = np.asarray(signals.columns, dtype=object)[sim["trade_col"][order]]
         trades = []
+        for k, (date, symbol) in enumerate(zip(exit_dates, symbols)):
+            trade = {
+                "date": date,
+                "symbol": symbol,
+                "entry_price": entry[k],
+                "exit_price": exit_[k],
+                "pnl": pnl[k],
+                "signal": side[k],
+            }
+            if with_option:
+                trade["option_type"] = "call" if side[k] > 0 else "put"
+                trade["option_entry"] = premium[k]
+                trade["option_exit"] = option_exit[k]
+            trades.append(trade)
 
-        # 逐日回测
-        for i in range(len(prices)):
-            date = prices.index[i]
-
-            # 处理持有期到期的头寸
-            for symbol in list(positions.keys()):
-                entry_date, entry_price, signal = positions[symbol]
-                days_held = (date - entry_date).days
-
-                if days_held >= holding_period:
-                    # 平仓
-                    exit_price = prices.loc[date, symbol]
-                    pnl = (exit_price - entry_price) * signal
-                    trades.append(
-                        {
-                            "date": date,
-                            "symbol": symbol,
-                            "entry_price": entry_price,
-                            "exit_price": exit_price,
-                            "pnl": pnl,
-                            "signal": signal,
-                        }
-                    )
-                    del positions[symbol]
+        portfolio_value = self._equity_curve(sim, 0, cost_rate)
+        return self._summarize(portfolio_value, trades)
 
-            # 处理新信号
-            if i < len(signals):
-                for symbol in signals.columns:
-                    signal = signals.iloc[i][symbol]
-                    if signal != 0 and symbol not in positions:
-                        entry_price = prices.loc[date, symbol]
-                        positions[symbol] = (date, entry_price, signal)
+    def _equity_curve(
+        self, sim: Dict[str, np.ndarray], variant: int, cost_rate: float
+    ) -> list:
+        """组合净值序列：初始资金 + 持仓浮盈 - 持仓的开仓与平仓成本"""
+        values = (
+            self.initial_capital
+            + sim["gross"][variant]
+            - cost_rate * sim["charged"][variant]
+        )
+        return [self.initial_capital] + values.tolist()
 
-            # 计算组合价值
-            current_value = self.initial_capital
-            for symbol, (entry_date, entry_price, signal) in positions.items():
-                current_price = prices.loc[date, symbol]
-                current_value += (current_price - entry_price) * signal
+    def run_option_overlay_backtest(
+        self,
+        prices: pd.DataFrame,
+        signals: pd.DataFrame,
+        iv: pd.DataFrame,
+        holding_period: int = 5,
+        tenor_days: int = 7,
+        r: float = 0.02,
+        call_premiums: Optional[pd.DataFrame] = None,
+        put_premiums: Optional[pd.DataFrame] = None,
+    ) -> Dict:
+        """
+        股票 + 期权腿回测（对应 SignalPolicy.build_trade_plan）
 
-            portfolio_value.append(current_value)
+        信号 1：做多正股 + 卖出平值 call；信号 -1：做空正股 + 买入平值 put。
+        行权价为开仓日收盘价，期限 tenor_days 个交易日；期权腿每天用当日 IV
+        批量做 BS 重估；持有期长于期限时，期权在到期行按当日收盘价结算内在价值，
+        之后不再随价格变动。交易成本只按股票腿成交金额计提。
+        开仓日 IV（或报价权利金）缺失的信号跳过；持仓期间 IV 缺失时当日组合净值
+        与对应交易的 option_exit / pnl 为 NaN，不按内在价值计价
 
-        # 计算回测指标
-        returns = pd.Series(portfolio_value).pct_change().dropna()
+        参数:
+            prices: 股票价格 DataFrame（日期 × 标的）
+            signals: 交易信号 DataFrame
+            iv: 隐含波动率 DataFrame（与 prices 同索引）
+            holding_period: 持有期（自然日）
+            tenor_days: 期权期限（交易日）
+            r: 无风险利率
+            call_premiums, put_premiums: 开仓权利金宽表（如模拟数据的 options 分区），
+                缺省时按开仓日 IV 用 BS 定价
 
-        result = {
-            "portfolio_value": portfolio_value,
-            "trades": trades,
+        返回:
+            Dict: 同 run_backtest，trades 另含 option_type / option_entry / option_exit
+        """
+        price_matrix, signal_matrix, stamps = self._to_arrays(prices, signals)
+        columns = list(signals.columns)
+        option_leg = {
+            "iv": iv.reindex(index=prices.index, columns=columns).to_numpy(dtype=float),
+            "tenor_days": tenor_days,
+            "r": r,
+        }
+        if call_premiums is not None and put_premiums is not None:
+            for name, table in (
+                ("call_premium", call_premiums),
+                ("put_premium", put_premiums),
+            ):
+                option_leg[name] = table.reindex(
+                    index=prices.index, columns=columns
+                ).to_numpy(dtype=float)
+        sim = self._simulate(
+            price_matrix,
+            signal_matrix,
+            stamps,
+            np.array([holding_period]),
+            option_leg=option_leg,
+        )
+        return self._single_result(prices, signals, sim)
+
+    def run_backtest_grid(
+        self,
+        prices: pd.DataFrame,
+        signals: pd.DataFrame,
+        holding_periods: Sequence[int] = (3, 5, 7, 10),
+        transaction_costs: Optional[Sequence[float]] = None,
+    ) -> pd.DataFrame:
+        """
+        多持有期 × 多成本档位的回测，一次扫描完成
+
+        参数:
+            prices: 股票价格 DataFrame
+            signals: 交易信号 DataFrame
+            holding_periods: 持有期列表（自然日）
+            transaction_costs: 成本档位列表（默认只用 self.transaction_cost）；
+                各档位的组合净值与 run_backtest 口径相同（只对持仓扣开仓 + 平仓成本）
+
+        返回:
+            DataFrame: holding_period / transaction_cost / total_return /
+            annual_return / annual_volatility / sharpe_ratio / max_drawdown / num_trades
+        """
+        if transaction_costs is None:
+            transaction_costs = [self.transaction_cost]
+        price_matrix, signal_matrix, stamps = self._to_arrays(prices, signals)
+        horizons = np.asarray(holding_periods)
+        sim = self._simulate(price_matrix, signal_matrix, stamps, horizons)
+        num_trades = np.bincount(sim["trade_variant"], minlength=len(horizons))
+
+        rows = []
+        for h, holding_period in enumerate(horizons):
+            for cost_rate in transaction_costs:
+                metrics = self._performance(self._equity_curve(sim, h, cost_rate))
+                rows.append(
+                    {
+                        "holding_period": int(holding_period),
+                        "transaction_cost": float(cost_rate),
+                        **metrics,
+                        "num_trades": int(num_trades[h]),
+                    }
+                )
+        return pd.DataFrame(rows)
+
+    def _performance(self, portfolio_value: list) -> Dict[str, float]:
+        """组合净值序列的收益 / 风险指标"""
+        returns = pd.Series(portfolio_value).pct_change().dropna()
+        return {
             "total_return": (portfolio_value[-1] - self.initial_capital)
             / self.initial_capital,
             "annual_return": returns.mean() * 252,
@@ -90,10 +425,16 @@ class BacktestRunner:
             if returns.std() > 0
             else 0,
             "max_drawdown": self._calculate_max_drawdown(portfolio_value),
-            "num_trades": len(trades),
         }
 
-        return result
+    def _summarize(self, portfolio_value: list, trades: list) -> Dict:
+        """由组合净值序列与交易列表计算回测指标"""
+        return {
+            "portfolio_value": portfolio_value,
+            "trades": trades,
+            **self._performance(portfolio_value),
+            "num_trades": len(trades),
+        }
 
     @staticmethod
     def _calculate_max_drawdown(portfolio_values: list) -> float:
@@ -0,0 +1,250 @@
+"""
+回测任务的多进程执行：数据集只发布一次，各进程按行区间取视图
+
+- 单一数值 dtype 的 DataFrame 写成 .npy 放在 /dev/shm（tmpfs），worker 以
+  写时复制（copy-on-write）方式 mmap 映射，不再把 DataFrame pickle 给每个任务；
+  未写入的页各进程共享，策略对输入的原地修改只影响本进程，与串行语义一致
+- 其他 DataFrame 退回为每个 worker 初始化时传一次
+- 结果顺序与任务顺序一致；给定种子时每个任务先设置全局随机种子，
+  串行与并行结果相同
+- run_tasks 额外记录每个任务的耗时，并把单个任务的异常隔离为错误信息
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+_SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# (策略函数, 起始行, 结束行, 随机种子)；行号为 None 表示整段数据
+SliceCall = Tuple[Callable, Optional[int], Optional[int], Optional[int]]
+
+
+@dataclass(frozen=True)
+class TaskOutcome:
+    """单个任务的结果、耗时（秒）与错误信息（成功时为 None）"""
+
+    name: str
+    result: object
+    elapsed: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(frozen=True)
+class SharedFrame:
+    """已发布到共享内存的 DataFrame（只含路径与索引，pickle 开销很小）"""
+
+    path: str
+    index: pd.Index
+    columns: pd.Index
+
+    def load(self) -> pd.DataFrame:
+        # "c"：写时复制，任务可像串行模式一样原地修改切片
+        values = np.load(self.path, mmap_mode="c")
+        return pd.DataFrame(values, index=self.index, columns=self.columns, copy=False)
+
+
+def _is_shareable(data: pd.DataFrame) -> bool:
+    dtypes = data.dtypes.unique()
+    return len(dtypes) == 1 and dtypes[0].kind in "biuf"
+
+
+@contextmanager
+def publish_frame(data: pd.DataFrame) -> Iterator[Union[SharedFrame, pd.DataFrame]]:
+    """
+    发布数据集供 worker 映射；退出时删除共享文件
+
+    混合 dtype 或非数值的 DataFrame 原样返回（由 worker 初始化时接收一次）
+    """
+    if not _is_shareable(data):
+        yield data
+        return
+    tmp_dir = tempfile.mkdtemp(prefix="methodd_", dir=_SHM_DIR)
+    try:
+        path = os.path.join(tmp_dir, "data.npy")
+        # 保留原内存布局（列主序），worker 端的归约顺序与串行一致
+        np.save(path, data.to_numpy())
+        yield SharedFrame(path, data.index, data.columns)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def task_seeds(seed: Optional[int], n_tasks: int) -> List[Optional[int]]:
+    """由主种子派生每个任务的独立种子（seed 为 None 时不设种子）"""
+    if seed is None:
+        return [None] * n_tasks
+    children = np.random.SeedSequence(seed).spawn(n_tasks)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+_WORKER_DATA: Optional[pd.DataFrame] = None
+
+
+def _init_worker(shared: Union[SharedFrame, pd.DataFrame]) -> None:
+    global _WORKER_DATA
+    _WORKER_DATA = shared.load() if isinstance(shared, SharedFrame) else shared
+
+
+def _call_slice(
+    data: pd.DataFrame,
+    func: Callable,
+    start: Optional[int],
+    stop: Optional[int],
+    seed: Optional[int],
+):
+    if start is not None or stop is not None:
+        data = data.iloc[start:stop]
+    if seed is not None:
+        np.random.seed(seed)
+    return func(data)
+
+
+def _worker_call(
+    func: Callable, start: Optional[int], stop: Optional[int], seed: Optional[int]
+):
+    return _call_slice(_WORKER_DATA, func, start, stop, seed)
+
+
+def _timed_call(
+    data: pd.DataFrame, func: Callable, seed: Optional[int]
+) -> Tuple[object, float, Optional[str]]:
+    started = time.perf_counter()
+    try:
+        result, error = _call_slice(data, func, None, None, seed), None
+    except Exception:
+        result, error = None, traceback.format_exc()
+    return result, time.perf_counter() - started, error
+
+
+def _worker_timed_call(func: Callable, seed: Optional[int]):
+    return _timed_call(_WORKER_DATA, func, seed)
+
+
+def _make_pool(shared: Union[SharedFrame, pd.DataFrame], n_workers: int):
+    return ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(shared,)
+    )
+
+
+def run_slices(
+    data: pd.DataFrame, calls: Sequence[SliceCall], n_jobs: int = 1
+) -> List[object]:
+    """
+    在数据的行区间上执行一组策略调用
+
+    参数:
+        data: 数据集
+        calls: (策略函数, 起始行, 结束行, 种子) 列表；并行时策略函数须可 pickle
+        n_jobs: 进程数，<= 1 时串行
+
+    返回:
+        List: 与 calls 同序的结果
+    """
+    if n_jobs <= 1 or len(calls) <= 1:
+        return [_call_slice(data, *call) for call in calls]
+    with publish_frame(data) as shared:
+        with _make_pool(shared, min(n_jobs, len(calls))) as pool:
+            futures = [pool.submit(_worker_call, *call) for call in calls]
+            return [future.result() for future in futures]
+
+
+def run_tasks(
+    data: pd.DataFrame,
+    tasks: Sequence[Tuple[str, Callable]],
+    n_jobs: int = 1,
+    seed: Optional[int] = None,
+) -> List[TaskOutcome]:
+    """
+    在同一数据集上执行一组命名任务，逐个计时并隔离失败
+
+    参数:
+        data: 数据集（并行时经共享内存发布一次）
+        tasks: (任务名, 策略函数) 列表；并行时策略函数须可 pickle
+        n_jobs: 进程数，<= 1 时串行
+        seed: 主随机种子（派生规则同 task_seeds）
+
+    返回:
+        List: 与 tasks 同序的 TaskOutcome；任务抛出异常或 worker 进程崩溃时
+        result 为 None，error 为错误信息，其余任务不受影响
+    """
+    seeds = task_seeds(seed, len(tasks))
+    if n_jobs <= 1 or len(tasks) <= 1:
+        return [
+            TaskOutcome(name, *_timed_call(data, func, task_seed))
+            for (name, func), task_seed in zip(tasks, seeds)
+        ]
+
+    with publish_frame(data) as shared:
+        outcomes = _run_pooled(
+            shared, tasks, seeds, list(range(len(tasks))), min(n_jobs, len(tasks))
+        )
+    return [outcomes[i] for i in range(len(tasks))]
+
+
+def _run_pooled(
+    shared: Union[SharedFrame, pd.DataFrame],
+    tasks: Sequence[Tuple[str, Callable]],
+    seeds: Sequence[Optional[int]],
+    indices: List[int],
+    n_workers: int,
+) -> Dict[int, TaskOutcome]:
+    """
+    在进程池中执行 indices 对应的任务
+
+    某个 worker 崩溃会使整个进程池失效，同池未完成的任务逐个放到单进程池
+    重跑，崩溃只记在真正导致崩溃的任务上
+    """
+    outcomes = {}
+    broken = []
+    with _make_pool(shared, n_workers) as pool:
+        submitted = time.perf_counter()
+        futures = [
+            pool.submit(_worker_timed_call, tasks[i][1], seeds[i]) for i in indices
+        ]
+        for i, future in zip(indices, futures):
+            name = tasks[i][0]
+            try:
+                outcomes[i] = TaskOutcome(name, *future.result())
+            except BrokenProcessPool:
+                broken.append(i)
+            except Exception:
+                # 函数或结果不可 pickle
+                elapsed = time.perf_counter() - submitted
+                outcomes[i] = TaskOutcome(name, None, elapsed, traceback.format_exc())
+
+    if len(indices) == 1 and broken:
+        elapsed = time.perf_counter() - submitted
+        outcomes[broken[0]] = TaskOutcome(
+            tasks[broken[0]][0], None, elapsed, "worker 进程异常退出"
+        )
+    else:
+        for i in broken:
+            outcomes.update(_run_pooled(shared, tasks, seeds, [i], 1))
+    return outcomes
+
+
+def outcomes_table(outcomes: Sequence[TaskOutcome]) -> pd.DataFrame:
+    """任务耗时与状态汇总（name / elapsed / ok / error）"""
+    return pd.DataFrame(
+        {
+            "name": [item.name for item in outcomes],
+            "elapsed": [item.elapsed for item in outcomes],
+            "ok": [item.ok for item in outcomes],
+            "error": [item.error for item in outcomes],
+        }
+    )
@@ -4,13 +4,75 @@ Walk-Forward 样本外验证框架
 
 import pandas as pd
 import numpy as np
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from src.backtest.parallel import TaskOutcome, run_slices, run_tasks, task_seeds
+
+
+@dataclass(frozen=True)
+class WalkForwardFold:
+    """单个 fold 的行区间（左闭右开），用到时才切片"""
+
+    fold: int
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+
+    def train(self, data: pd.DataFrame) -> pd.DataFrame:
+        return data.iloc[self.train_start : self.train_stop]
+
+    def test(self, data: pd.DataFrame) -> pd.DataFrame:
+        return data.iloc[self.test_start : self.test_stop]
 
 
 class WalkForwardValidator:
     """Walk-Forward 样本外验证"""
 
+    @staticmethod
+    def make_folds(
+        n_rows: int,
+        train_size: int = 60,
+        test_size: int = 20,
+        step_size: int = 10,
+        purge: int = 0,
+        embargo: int = 0,
+    ) -> List[WalkForwardFold]:
+        """
+        生成 Walk-Forward 的行区间
+
+        参数:
+            n_rows: 数据行数
+            train_size: 训练窗口（行）
+            test_size: 测试集大小（行）
+            step_size: 步长（行）
+            purge: 从训练窗口末尾剔除的行数（标签与测试期重叠的样本）
+            embargo: 训练窗口与测试集之间空出的行数
+
+        返回:
+            List: WalkForwardFold 列表（purge = embargo = 0 时与 split_walk_forward 一致）
+        """
+        if purge < 0 or embargo < 0 or purge >= train_size:
+            raise ValueError("purge / embargo 须非负，且 purge 小于 train_size")
+        folds = []
+        for i in range(0, n_rows - train_size - embargo - test_size, step_size):
+            train_end = i + train_size
+            test_start = train_end + embargo
+            test_end = test_start + test_size
+
+            if test_end > n_rows:
+                break
+
+            folds.append(
+                WalkForwardFold(
+                    len(folds) + 1, i, train_end - purge, test_start, test_end
+                )
+            )
+
+        return folds
+
     @staticmethod
     def split_walk_forward(
         data: pd.DataFrame,
@@ -30,22 +92,22 @@ class WalkForwardValidator:
         返回:
             List: (训练集, 测试集) 元组列表
         """
-        splits = []
-        total_size = len(data)
-
-        for i in range(0, total_size - train_size - test_size, step_size):
-            train_end = i + train_size
-            test_end = train_end + test_size
-
-            if test_end > total_size:
-                break
+        folds = WalkForwardValidator.make_folds(
+            len(data), train_size, test_size, step_size
+        )
+        return [(fold.train(data), fold.test(data)) for fold in folds]
 
-            train_data = data.iloc[i:train_end]
-            test_data = data.iloc[train_end:test_end]
-
-            splits.append((train_data, test_data))
-
-        return splits
+    @staticmethod
+    def _oos_row(fold: int, train_result: Dict, test_result: Dict) -> Dict:
+        return {
+            "fold": fold,
+            "train_return": train_result.get("total_return", 0),
+            "test_return": test_result.get("total_return", 0),
+            "degradation": train_result.get("total_return", 0)
+            - test_result.get("total_return", 0),
+            "train_sharpe": train_result.get("sharpe_ratio", 0),
+            "test_sharpe": test_result.get("sharpe_ratio", 0),
+        }
 
     @staticmethod
     def evaluate_walk_forward(
@@ -77,26 +139,69 @@ class WalkForwardValidator:
             results["test_results"].append(test_result)
 
             # 计算样本外性能
-            oos_performance = {
-                "fold": i + 1,
-                "train_return": train_result.get("total_return", 0),
-                "test_return": test_result.get("total_return", 0),
-                "degradation": train_result.get("total_return", 0)
-                - test_result.get("total_return", 0),
-                "train_sharpe": train_result.get("sharpe_ratio", 0),
-                "test_sharpe": test_result.get("sharpe_ratio", 0),
-            }
+            oos_performance = WalkForwardValidator._oos_row(
+                i + 1, train_result, test_result
+            )
             results["out_of_sample_performance"].append(oos_performance)
 
         return results
 
+    @staticmethod
+    def run_walk_forward(
+        data: pd.DataFrame,
+        strategy_func,
+        folds: List[WalkForwardFold],
+        n_jobs: int = 1,
+        seed: Optional[int] = None,
+    ) -> Dict:
+        """
+        按 fold 区间评估（可多进程）
+
+        参数:
+            data: 完整数据集
+            strategy_func: 策略函数（并行时须为模块级函数）
+            folds: make_folds 的结果
+            n_jobs: 进程数，<= 1 时串行；并行时数据集经共享内存发布一次
+            seed: 主随机种子；每次策略调用前设置派生种子，串行 / 并行结果一致
+
+        返回:
+            Dict: 与 evaluate_walk_forward 相同的结构
+        """
+        seeds = task_seeds(seed, 2 * len(folds))
+        calls = []
+        for k, fold in enumerate(folds):
+            calls.append(
+                (strategy_func, fold.train_start, fold.train_stop, seeds[2 * k])
+            )
+            calls.append(
+                (strategy_func, fold.test_start, fold.test_stop, seeds[2 * k + 1])
+            )
+        outputs = run_slices(data, calls, n_jobs=n_jobs)
+
+        results = {
+            "train_results": outputs[0::2],
+            "test_results": outputs[1::2],
+            "out_of_sample_performance": [],
+        }
+        for fold, train_result, test_result in zip(
+            folds, results["train_results"], results["test_results"]
+        ):
+            results["out_of_sample_performance"].append(
+                WalkForwardValidator._oos_row(fold.fold, train_result, test_result)
+            )
+        return results
+
 
 class AblationStudy:
     """消融实验"""
 
     @staticmethod
     def run_ablation_study(
-        data: pd.DataFrame, base_strategy_func, ablation_configs: Dict
+        data: pd.DataFrame,
+        base_strategy_func,
+        ablation_configs: Dict,
+        n_jobs: int = 1,
+        seed: Optional[int] = None,
     ) -> Dict:
         """
         运行消融实验
@@ -105,19 +210,34 @@ class AblationStudy:
             data: 数据集
             base_strategy_func: 基础策略函数
             ablation_configs: 消融配置字典
+            n_jobs: 进程数，<= 1 时串行；并行时策略函数须为模块级函数
+            seed: 主随机种子（None 时不设置，行为同串行旧版）
 
         返回:
-            Dict: 消融实验结果
+            Dict: 消融实验结果；timings 为各任务耗时（秒），
+            errors 为失败的消融及其错误信息（失败项不进入 ablation_results）
         """
-        results = {"base_result": None, "ablation_results": {}}
+        tasks = [("base", base_strategy_func)] + list(ablation_configs.items())
+        outcomes = run_tasks(data, tasks, n_jobs=n_jobs, seed=seed)
+        base_outcome = outcomes[0]
+        if not base_outcome.ok:
+            raise ValueError(f"基础策略运行失败:\n{base_outcome.error}")
 
-        # 运行基础策略
-        base_result = base_strategy_func(data)
-        results["base_result"] = base_result
+        base_result = base_outcome.result
+        results = {
+            "base_result": base_result,
+            "ablation_results": {},
+            "timings": {"base": base_outcome.elapsed},
+            "errors": {},
+        }
 
-        # 运行消融实验
-        for ablation_name, ablation_func in ablation_configs.items():
-            ablation_result = ablation_func(data)
+        # 消融结果（按配置顺序）
+        for (ablation_name, _), outcome in zip(tasks[1:], outcomes[1:]):
+            results["timings"][ablation_name] = outcome.elapsed
+            if not outcome.ok:
+                results["errors"][ablation_name] = outcome.error
+                continue
+            ablation_result = outcome.result
             results["ablation_results"][ablation_name] = {
                 "result": ablation_result,
                 "impact": {
@@ -137,24 +257,52 @@ class ComparisonExperiment:
     """对照实验"""
 
     @staticmethod
-    def run_comparison(data: pd.DataFrame, strategies: Dict) -> Dict:
+    def run_comparison_tasks(
+        data: pd.DataFrame,
+        strategies: Dict,
+        n_jobs: int = 1,
+        seed: Optional[int] = None,
+    ) -> List[TaskOutcome]:
         """
-        运行对照实验
+        运行对照实验，保留每个策略的耗时与错误信息
 
         参数:
             data: 数据集
             strategies: 策略字典 {策略名: 策略函数}
+            n_jobs: 进程数，<= 1 时串行；并行时策略函数须为模块级函数
+            seed: 主随机种子（None 时不设置）
 
         返回:
-            Dict: 对照实验结果
+            List: 按 strategies 顺序的 TaskOutcome（可用 outcomes_table 汇总）
         """
-        results = {}
+        return run_tasks(data, list(strategies.items()), n_jobs=n_jobs, seed=seed)
 
-        for strategy_name, strategy_func in strategies.items():
-            result = strategy_func(data)
-            results[strategy_name] = result
+    @staticmethod
+    def run_comparison(
+        data: pd.DataFrame,
+        strategies: Dict,
+        n_jobs: int = 1,
+        seed: Optional[int] = None,
+    ) -> Dict:
+        """
+        运行对照实验
 
-        return results
+        参数:
+            data: 数据集
+            strategies: 策略字典 {策略名: 策略函数}
+            n_jobs: 进程数，<= 1 时串行
+            seed: 主随机种子（None 时不设置）
+
+        返回:
+            Dict: 对照实验结果（失败的策略为 {"error": 错误信息}）
+        """
+        outcomes = ComparisonExperiment.run_comparison_tasks(
+            data, strategies, n_jobs=n_jobs, seed=seed
+        )
+        return {
+            outcome.name: outcome.result if outcome.ok else {"error": outcome.error}
+            for outcome in outcomes
+        }
 
     @staticmethod
     def compare_strategies(comparison_results: Dict) -> pd.DataFrame:
@@ -170,6 +318,8 @@ class ComparisonExperiment:
         comparison_data = []
 
         for strategy_name, result in comparison_results.items():
+            if "error" in result:
+                continue
             comparison_data.append(
                 {
                     "Strategy": strategy_name,
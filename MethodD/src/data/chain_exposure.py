@@ -0,0 +1,181 @@
+"""
+期权链 Greeks 与持仓暴露聚合：整链一次向量化计算，按到期 × moneyness 分桶汇总
+
+每个快照的汇总结果落盘为同目录的 <snapshot>.exposure.parquet
+"""
+
+import glob
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.real_data_loader import load_snapshot
+from src.data.snapshot_store import RUNS_DIR, list_run_manifests
+from src.pricing.bs_pricer import BlackScholesOption
+from src.pricing.implied_vol import year_fraction_to_expiry
+
+
+CONTRACT_MULTIPLIER = 100
+MONEYNESS_EDGES = [0.0, 0.8, 0.9, 0.95, 1.0, 1.05, 1.1, 1.2, np.inf]
+MONEYNESS_LABELS = [
+    "<0.80",
+    "0.80-0.90",
+    "0.90-0.95",
+    "0.95-1.00",
+    "1.00-1.05",
+    "1.05-1.10",
+    "1.10-1.20",
+    ">=1.20",
+]
+EXPOSURE_SUFFIX = ".exposure.parquet"
+
+
+def compute_chain_greeks(
+    chain_df: pd.DataFrame, spot: float, as_of, r: float = 0.02
+) -> pd.DataFrame:
+    """
+    整链批量计算 Greeks（使用快照自带 iv）
+
+    参数:
+        chain_df: 快照期权链（expiry / strike / iv / optionType / openInterest）
+        spot: 快照现价
+        as_of: 快照时间戳
+        r: 无风险利率
+
+    返回:
+        DataFrame: 原链 + T / moneyness / delta / gamma / vega / theta
+        （iv 缺失或已到期的合约 Greeks 为 NaN）
+    """
+    result = chain_df.copy()
+    strike = pd.to_numeric(result["strike"], errors="coerce").to_numpy(dtype=float)
+    iv = pd.to_numeric(result["iv"], errors="coerce").to_numpy(dtype=float)
+    T = year_fraction_to_expiry(result["expiry"], as_of)
+    usable = (T > 0) & (iv > 0) & (strike > 0)
+
+    greeks = BlackScholesOption.batch_price_greeks(
+        float(spot),
+        strike,
+        T,
+        r,
+        iv,
+        result["optionType"].astype(str).to_numpy(),
+    )
+    result["T"] = T
+    result["moneyness"] = strike / float(spot)
+    for name in ["delta", "gamma", "vega", "theta"]:
+        result[name] = np.where(usable, greeks[name], np.nan)
+    return result
+
+
+def aggregate_exposures(greeks_df: pd.DataFrame, spot: float) -> pd.DataFrame:
+    """
+    按 到期 × moneyness 桶 汇总未平仓量加权的暴露（按持有多头口径，每张 100 股）
+
+    返回:
+        DataFrame: expiry / moneyness_bucket / n_contracts / open_interest /
+        call_oi / put_oi / delta_exposure（股数）/ delta_notional /
+        gamma_exposure（现价变动 1% 的 delta 名义变化）/ vega_exposure /
+        theta_exposure
+    """
+    df = greeks_df.dropna(subset=["delta"])
+    oi = pd.to_numeric(df["openInterest"], errors="coerce").fillna(0.0)
+    shares = oi * CONTRACT_MULTIPLIER
+    is_call = df["optionType"].astype(str) == "call"
+
+    weighted = pd.DataFrame(
+        {
+            "expiry": df["expiry"].astype(str),
+            "moneyness_bucket": pd.cut(
+                df["moneyness"],
+                bins=MONEYNESS_EDGES,
+                labels=MONEYNESS_LABELS,
+                right=False,
+            ),
+            "n_contracts": 1,
+            "open_interest": oi,
+            "call_oi": oi.where(is_call, 0.0),
+            "put_oi": oi.where(~is_call, 0.0),
+            "delta_exposure": shares * df["delta"],
+            "delta_notional": shares * df["delta"] * spot,
+            "gamma_exposure": shares * df["gamma"] * spot**2 * 0.01,
+            "vega_exposure": shares * df["vega"],
+            "theta_exposure": shares * df["theta"],
+        }
+    )
+    return (
+        weighted.groupby(["expiry", "moneyness_bucket"], observed=True, sort=True)
+        .sum()
+        .reset_index()
+    )
+
+
+def snapshot_exposure(snapshot_path: str, r: float = 0.02) -> pd.DataFrame:
+    """读取单个快照并计算其暴露汇总（附 ticker / timestamp / spot）"""
+    snapshot = load_snapshot(snapshot_path)
+    spot = float(snapshot["spot"])
+    greeks = compute_chain_greeks(
+        snapshot["chain"], spot, snapshot.get("timestamp"), r=r
+    )
+    exposure = aggregate_exposures(greeks, spot)
+    exposure.insert(0, "spot", spot)
+    exposure.insert(0, "timestamp", snapshot.get("timestamp"))
+    exposure.insert(0, "ticker", snapshot.get("ticker"))
+    return exposure
+
+
+def write_exposure_side_file(
+    snapshot_path: str, r: float = 0.02, overwrite: bool = False
+) -> str:
+    """写入快照旁的 exposure parquet；已存在且不覆盖时直接返回路径"""
+    out_path = snapshot_path[: -len(".json")] + EXPOSURE_SUFFIX
+    if overwrite or not os.path.exists(out_path):
+        exposure = snapshot_exposure(snapshot_path, r=r)
+        exposure["moneyness_bucket"] = exposure["moneyness_bucket"].astype(str)
+        exposure.to_parquet(out_path, index=False)
+    return out_path
+
+
+def _run_snapshot_files(run_id: str) -> List[str]:
+    run_dir = os.path.join(RUNS_DIR, run_id)
+    return sorted(
+        path
+        for path in glob.glob(os.path.join(run_dir, "*.json"))
+        if os.path.basename(path) != "manifest.json"
+    )
+
+
+def build_run_exposures(
+    run_ids: Optional[List[str]] = None, r: float = 0.02, overwrite: bool = False
+) -> pd.DataFrame:
+    """
+    为 runs 目录下所有（或指定）run 的快照生成 exposure 旁路文件并合并返回
+
+    参数:
+        run_ids: 指定 run 列表，None 为全部
+        r: 无风险利率
+        overwrite: 是否重算已存在的旁路文件
+
+    返回:
+        DataFrame: 各快照暴露汇总（附 run_id / snapshot 文件名）
+    """
+    if run_ids is None:
+        run_ids = sorted(list_run_manifests())
+    frames: Dict[str, pd.DataFrame] = {}
+    for run_id in run_ids:
+        for snapshot_path in _run_snapshot_files(run_id):
+            try:
+                out_path = write_exposure_side_file(
+                    snapshot_path, r=r, overwrite=overwrite
+                )
+            except Exception as exc:
+                print(f"跳过快照 {snapshot_path}: {exc}")
+                continue
+            exposure = pd.read_parquet(out_path)
+            exposure.insert(0, "snapshot", os.path.basename(snapshot_path))
+            exposure.insert(0, "run_id", run_id)
+            frames[snapshot_path] = exposure
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames.values(), ignore_index=True)
@@ -6,15 +6,174 @@ import os
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+
+
+DEFAULT_PRE_DAYS = 3
+DEFAULT_POST_DAYS = 2
+
+# 回退：模拟财报日历（本地 CSV 缺失或为空时使用）
+FALLBACK_EARNINGS = {
+    "NVDA": [
+        datetime(2025, 1, 22),
+        datetime(2025, 4, 16),
+        datetime(2025, 7, 23),
+        datetime(2025, 10, 22),
+    ],
+    "AAPL": [
+        datetime(2025, 1, 29),
+        datetime(2025, 4, 30),
+        datetime(2025, 7, 30),
+        datetime(2025, 10, 29),
+    ],
+}
+
+DEFAULT_BORROW_RATE = 0.02
+MAX_SHORT_BORROW_RATE = 0.02
+BORROW_DAY_COUNT = 360
+ALWAYS_EFFECTIVE = pd.Timestamp("1900-01-01")
+
+# 回退：模拟融券利率（本地 CSV 缺失或为空时使用）
+FALLBACK_BORROW_RATES = {
+    "NVDA": 0.015,  # 1.5%
+    "AAPL": 0.008,  # 0.8%
+    "TSLA": 0.025,  # 2.5%
+    "AMD": 0.018,  # 1.8%
+    "MSFT": 0.010,  # 1.0%
+    "GOOGL": 0.012,  # 1.2%
+}
+
+# (标的编码, 日) 合成一个 int64 键：高 32 位为编码，低 32 位为偏移后的日序号
+_DAY_BITS = 32
+_DAY_BIAS = 1 << 31
+
+DateLike = Union[pd.DatetimeIndex, Sequence, np.ndarray]
+
+
+def _day_bounds(dates: DateLike) -> Tuple[np.ndarray, np.ndarray]:
+    """日期向下 / 向上取整到自然日（int64 日序号）"""
+    stamps = pd.DatetimeIndex(dates)
+    if stamps.tz is not None:
+        stamps = stamps.tz_localize(None)
+    floor = stamps.floor("D")
+    floor_days = floor.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    ceil_days = floor_days + (stamps != floor).astype(np.int64)
+    return floor_days, ceil_days
+
+
+class EarningsBlackoutIndex:
+    """
+    财报窗口区间索引
+
+    日历一次性载入为按 (标的, 日期) 排序的 int64 键数组；查询某个 (标的, 日期)
+    是否落在 [财报日 - pre_days, 财报日 + post_days] 内，等价于查询
+    [日期 - post_days, 日期 + pre_days] 内是否有财报日，一次 searchsorted 即可，
+    整张面板可以批量回答
+    """
+
+    def __init__(
+        self,
+        calendar: pd.DataFrame,
+        pre_days: int = DEFAULT_PRE_DAYS,
+        post_days: int = DEFAULT_POST_DAYS,
+    ):
+        calendar = calendar.dropna(subset=["ticker", "earnings_date"])
+        self.pre_days = pre_days
+        self.post_days = post_days
+        self.tickers = pd.Index(sorted(calendar["ticker"].astype(str).unique()))
+        codes = self.tickers.get_indexer(calendar["ticker"].astype(str))
+        days, _ = _day_bounds(calendar["earnings_date"])
+        self._keys = np.unique(self._make_keys(codes, days))
+
+    @staticmethod
+    def _make_keys(codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+        return (codes.astype(np.int64) << _DAY_BITS) + (days + _DAY_BIAS)
+
+    def _codes(self, tickers: Union[str, Sequence[str], np.ndarray], n: int):
+        if isinstance(tickers, str):
+            return np.full(n, self.tickers.get_indexer([tickers])[0], dtype=np.int64)
+        return self.tickers.get_indexer(pd.Index(tickers).astype(str))
+
+    def _query(
+        self, codes: np.ndarray, floor_days: np.ndarray, ceil_days: np.ndarray
+    ) -> np.ndarray:
+        """逐元素查询（参数可广播）"""
+        if len(self._keys) == 0:
+            return np.zeros(np.broadcast(codes, floor_days).shape, dtype=bool)
+        lower = self._make_keys(codes, ceil_days - self.post_days)
+        upper = self._make_keys(codes, floor_days + self.pre_days)
+        pos = np.searchsorted(self._keys, lower, side="left")
+        found = pos < len(self._keys)
+        candidate = self._keys[np.minimum(pos, len(self._keys) - 1)]
+        return found & (candidate <= upper) & (codes >= 0)
+
+    def earnings_dates(self, ticker: str) -> np.ndarray:
+        """某个标的的财报日（升序，datetime64[D]）"""
+        code = self.tickers.get_indexer([ticker])[0]
+        if code < 0:
+            return np.array([], dtype="datetime64[D]")
+        lo, hi = np.searchsorted(
+            self._keys, [code << _DAY_BITS, (code + 1) << _DAY_BITS]
+        )
+        days = (self._keys[lo:hi] & ((1 << _DAY_BITS) - 1)) - _DAY_BIAS
+        return days.astype("datetime64[D]")
+
+    def in_blackout(
+        self, tickers: Union[str, Sequence[str], np.ndarray], dates: DateLike
+    ) -> np.ndarray:
+        """
+        逐元素判断 (ticker, date) 是否落在财报窗口内
+
+        参数:
+            tickers: 单个标的或与 dates 等长的标的数组
+            dates: 日期数组
+
+        返回:
+            ndarray: bool，未出现在日历中的标的恒为 False
+        """
+        floor_days, ceil_days = _day_bounds(dates)
+        codes = self._codes(tickers, len(floor_days))
+        return self._query(codes, floor_days, ceil_days)
+
+    def next_earnings(
+        self, tickers: Union[str, Sequence[str], np.ndarray], dates: DateLike
+    ) -> np.ndarray:
+        """每个 (ticker, date) 当天及之后的下一个财报日（没有时为 NaT）"""
+        floor_days, _ = _day_bounds(dates)
+        codes = self._codes(tickers, len(floor_days))
+        if len(self._keys) == 0:
+            return np.full(len(floor_days), np.datetime64("NaT"), dtype="datetime64[D]")
+        pos = np.searchsorted(self._keys, self._make_keys(codes, floor_days))
+        candidate = self._keys[np.minimum(pos, len(self._keys) - 1)]
+        found = (pos < len(self._keys)) & (codes >= 0)
+        found &= (candidate >> _DAY_BITS) == codes
+        days = (candidate & ((1 << _DAY_BITS) - 1)) - _DAY_BIAS
+        result = days.astype("datetime64[D]")
+        result[~found] = np.datetime64("NaT")
+        return result
+
+    def blackout_panel(self, dates: DateLike, tickers: Sequence[str]) -> np.ndarray:
+        """（日期 × 标的）的财报窗口掩码"""
+        floor_days, ceil_days = _day_bounds(dates)
+        codes = self.tickers.get_indexer(pd.Index(tickers).astype(str))
+        return self._query(codes[None, :], floor_days[:, None], ceil_days[:, None])
+
+    def apply_to_panel(
+        self, signal_panel: pd.DataFrame, fill_value: float = 0
+    ) -> pd.DataFrame:
+        """把财报窗口内的信号置为 fill_value（面板索引为日期、列为标的）"""
+        mask = self.blackout_panel(signal_panel.index, signal_panel.columns)
+        return signal_panel.mask(mask, fill_value)
 
 
 class EarningsWindowFilter:
     """财报窗口过滤器"""
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def _load_earnings_calendar() -> pd.DataFrame:
-        """读取本地财报日历（Demo 样例）"""
+        """读取本地财报日历（Demo 样例，进程内只读一次）"""
         data_path = os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
             "data",
@@ -24,6 +183,29 @@ class EarningsWindowFilter:
             return pd.read_csv(data_path, parse_dates=["earnings_date"])
         return pd.DataFrame(columns=["ticker", "earnings_date"])
 
+    @staticmethod
+    def earnings_calendar() -> pd.DataFrame:
+        """财报日历（ticker / earnings_date）；本地样例为空时用模拟数据"""
+        calendar_df = EarningsWindowFilter._load_earnings_calendar()
+        if not calendar_df.empty:
+            return calendar_df[["ticker", "earnings_date"]]
+        rows = [
+            {"ticker": ticker, "earnings_date": pd.Timestamp(day)}
+            for ticker, days in FALLBACK_EARNINGS.items()
+            for day in days
+        ]
+        return pd.DataFrame(rows, columns=["ticker", "earnings_date"])
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def blackout_index(
+        pre_days: int = DEFAULT_PRE_DAYS, post_days: int = DEFAULT_POST_DAYS
+    ) -> EarningsBlackoutIndex:
+        """共享的财报窗口索引（按窗口参数缓存）"""
+        return EarningsBlackoutIndex(
+            EarningsWindowFilter.earnings_calendar(), pre_days, post_days
+        )
+
     @staticmethod
     def get_earnings_dates(ticker: str) -> List[datetime]:
         """
@@ -42,21 +224,7 @@ class EarningsWindowFilter:
             return filtered["earnings_date"].dt.to_pydatetime().tolist()
 
         # 回退：模拟数据
-        earnings_calendar = {
-            "NVDA": [
-                datetime(2025, 1, 22),
-                datetime(2025, 4, 16),
-                datetime(2025, 7, 23),
-                datetime(2025, 10, 22),
-            ],
-            "AAPL": [
-                datetime(2025, 1, 29),
-                datetime(2025, 4, 30),
-                datetime(2025, 7, 30),
-                datetime(2025, 10, 29),
-            ],
-        }
-        return earnings_calendar.get(ticker, [])
+        return list(FALLBACK_EARNINGS.get(ticker, []))
 
     @staticmethod
     def filter_earnings_window(
@@ -73,21 +241,8 @@ class EarningsWindowFilter:
         返回:
             DatetimeIndex: 过滤后的日期
         """
-        earnings_dates = EarningsWindowFilter.get_earnings_dates(ticker)
-
-        # 创建过滤掩码
-        mask = pd.Series(True, index=dates)
-
-        for earnings_date in earnings_dates:
-            # 财报前 3 日 + 后 2 日
-            start = earnings_date - timedelta(days=3)
-            end = earnings_date + timedelta(days=2)
-
-            # 标记为 False（过滤掉）
-            window_mask = (dates >= start) & (dates <= end)
-            mask[window_mask] = False
-
-        return dates[mask]
+        blackout = EarningsWindowFilter.blackout_index().in_blackout(ticker, dates)
+        return dates[~blackout]
 
     @staticmethod
     def get_earnings_window_info(ticker: str) -> Dict:
@@ -114,12 +269,106 @@ class EarningsWindowFilter:
         }
 
 
+class BorrowRateStore:
+    """
+    融券利率表：按 (ticker, effective_date) 保存，随时间变化
+
+    没有 effective_date 列的静态利率视为一直有效；查询用 merge_asof 一次完成
+    （取不晚于查询日的最近一条），找不到时取 default_rate
+    """
+
+    def __init__(self, rates: pd.DataFrame, default_rate: float = DEFAULT_BORROW_RATE):
+        table = rates.dropna(subset=["ticker", "borrow_rate"]).copy()
+        table["ticker"] = table["ticker"].astype(str)
+        table["borrow_rate"] = table["borrow_rate"].astype(float)
+        if "effective_date" in table.columns:
+            effective = pd.to_datetime(table["effective_date"])
+            table["effective_date"] = effective.fillna(ALWAYS_EFFECTIVE)
+        else:
+            table["effective_date"] = ALWAYS_EFFECTIVE
+        table["effective_date"] = table["effective_date"].astype("datetime64[ns]")
+        # 同一生效日的多条记录取文件中的最后一条
+        table = table.drop_duplicates(["ticker", "effective_date"], keep="last")
+        self.table = table.sort_values("effective_date", kind="stable")[
+            ["ticker", "effective_date", "borrow_rate"]
+        ].reset_index(drop=True)
+        self.default_rate = default_rate
+
+    def latest_rates(self, tickers: Sequence[str]) -> pd.Series:
+        """各标的最新一条利率（按 tickers 顺序，缺失为 default_rate）"""
+        latest = self.table.groupby("ticker")["borrow_rate"].last()
+        return latest.reindex(pd.Index(tickers, dtype=object)).fillna(self.default_rate)
+
+    def rates_asof(
+        self,
+        panel: pd.DataFrame,
+        date_col: str = "date",
+        ticker_col: str = "ticker",
+    ) -> pd.Series:
+        """
+        对 (date, ticker) 长表做 as-of 查询
+
+        返回:
+            Series: 与 panel 同索引的融券利率
+        """
+        left = pd.DataFrame(
+            {
+                "effective_date": pd.to_datetime(panel[date_col]).astype(
+                    "datetime64[ns]"
+                ),
+                "ticker": panel[ticker_col].astype(str).to_numpy(),
+                "_row": np.arange(len(panel)),
+            }
+        ).sort_values("effective_date", kind="stable")
+        merged = pd.merge_asof(
+            left, self.table, on="effective_date", by="ticker", direction="backward"
+        )
+        rates = np.empty(len(panel))
+        rates[merged["_row"].to_numpy()] = (
+            merged["borrow_rate"].fillna(self.default_rate).to_numpy()
+        )
+        return pd.Series(rates, index=panel.index, name="borrow_rate")
+
+    def rate_panel(self, dates: DateLike, tickers: Sequence[str]) -> pd.DataFrame:
+        """（日期 × 标的）利率宽表"""
+        dates = pd.DatetimeIndex(dates)
+        long_df = pd.DataFrame(
+            {
+                "date": np.repeat(dates, len(tickers)),
+                "ticker": np.tile(np.asarray(tickers, dtype=object), len(dates)),
+            }
+        )
+        rates = self.rates_asof(long_df).to_numpy()
+        return pd.DataFrame(
+            rates.reshape(len(dates), len(tickers)), index=dates, columns=tickers
+        )
+
+    @staticmethod
+    def short_eligible(
+        rates: Union[pd.Series, pd.DataFrame, np.ndarray],
+        max_rate: float = MAX_SHORT_BORROW_RATE,
+    ):
+        """可做空掩码：融券利率 < max_rate"""
+        return rates < max_rate
+
+    @staticmethod
+    def borrow_cost(
+        short_notional: Union[pd.Series, pd.DataFrame, np.ndarray],
+        rates: Union[pd.Series, pd.DataFrame, np.ndarray],
+        days: Union[int, np.ndarray] = 1,
+        day_count: int = BORROW_DAY_COUNT,
+    ):
+        """融券费用计提：|做空名义金额| × 年化利率 × 天数 / day_count"""
+        return abs(short_notional) * rates * days / day_count
+
+
 class BorrowRateFilter:
     """融券利率过滤器"""
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def _load_borrow_rates() -> pd.DataFrame:
-        """读取本地融券利率（Demo 样例）"""
+        """读取本地融券利率（Demo 样例，进程内只读一次）"""
         data_path = os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
             "data",
@@ -129,10 +378,21 @@ class BorrowRateFilter:
             return pd.read_csv(data_path)
         return pd.DataFrame(columns=["ticker", "borrow_rate"])
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def store() -> BorrowRateStore:
+        """共享的融券利率表；本地样例为空时用模拟数据"""
+        borrow_df = BorrowRateFilter._load_borrow_rates()
+        if borrow_df.empty:
+            borrow_df = pd.DataFrame(
+                list(FALLBACK_BORROW_RATES.items()), columns=["ticker", "borrow_rate"]
+            )
+        return BorrowRateStore(borrow_df)
+
     @staticmethod
     def get_borrow_rates(tickers: List[str]) -> Dict[str, float]:
         """
-        获取融券利率（模拟实现）
+        获取融券利率（各标的最新一条，缺失时默认 2%）
 
         参数:
             tickers: 股票代码列表
@@ -140,26 +400,7 @@ class BorrowRateFilter:
         返回:
             Dict: 股票代码 -> 融券利率
         """
-        # 优先读取本地 Demo 样例（可追溯）
-        borrow_df = BorrowRateFilter._load_borrow_rates()
-        if not borrow_df.empty:
-            rates = borrow_df.set_index("ticker")["borrow_rate"].to_dict()
-        else:
-            # 回退：模拟数据
-            rates = {
-                "NVDA": 0.015,  # 1.5%
-                "AAPL": 0.008,  # 0.8%
-                "TSLA": 0.025,  # 2.5%
-                "AMD": 0.018,  # 1.8%
-                "MSFT": 0.010,  # 1.0%
-                "GOOGL": 0.012,  # 1.2%
-            }
-
-        result = {}
-        for ticker in tickers:
-            result[ticker] = rates.get(ticker, 0.02)  # 默认 2%
-
-        return result
+        return BorrowRateFilter.store().latest_rates(tickers).to_dict()
 
     @staticmethod
     def filter_by_borrow_rate(tickers: List[str], max_rate: float = 0.02) -> List[str]:
@@ -173,32 +414,21 @@ class BorrowRateFilter:
         返回:
             List: 符合条件的股票代码
         """
-        borrow_rates = BorrowRateFilter.get_borrow_rates(tickers)
-
-        filtered = []
-        for ticker, rate in borrow_rates.items():
-            if rate < max_rate:
-                filtered.append(ticker)
-
-        return filtered
+        rates = BorrowRateFilter.store().latest_rates(list(dict.fromkeys(tickers)))
+        return rates.index[BorrowRateStore.short_eligible(rates, max_rate)].tolist()
 
     @staticmethod
     def get_borrow_rate_info(tickers: List[str]) -> pd.DataFrame:
         """获取融券利率信息"""
-        borrow_rates = BorrowRateFilter.get_borrow_rates(tickers)
-
-        data = []
-        for ticker, rate in borrow_rates.items():
-            data.append(
-                {
-                    "ticker": ticker,
-                    "borrow_rate": rate,
-                    "borrow_rate_pct": f"{rate:.2%}",
-                    "eligible_for_short": rate < 0.02,
-                }
-            )
-
-        return pd.DataFrame(data)
+        rates = BorrowRateFilter.store().latest_rates(list(dict.fromkeys(tickers)))
+        return pd.DataFrame(
+            {
+                "ticker": rates.index.tolist(),
+                "borrow_rate": rates.to_numpy(),
+                "borrow_rate_pct": [f"{rate:.2%}" for rate in rates],
+                "eligible_for_short": rates.to_numpy() < MAX_SHORT_BORROW_RATE,
+            }
+        )
 
 
 class ConstraintsAnalyzer:
@@ -250,3 +480,53 @@ class ConstraintsAnalyzer:
             if earnings_info["next_earnings"]
             else None,
         }
+
+    @staticmethod
+    def analyze_universe(
+        tickers: Sequence[str],
+        start_date: str,
+        end_date: str,
+        as_of: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        全标的约束分析（共享财报索引与融券利率表，按列计算）
+
+        参数:
+            tickers: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            as_of: 计算“下一个财报日”的参照日（默认今天）
+
+        返回:
+            DataFrame: ticker / total_days / trading_days / filtered_days /
+            filter_ratio / next_earnings / days_to_next_earnings / borrow_rate /
+            eligible_for_short，每个标的一行
+        """
+        tickers = list(dict.fromkeys(str(ticker) for ticker in tickers))
+        dates = pd.date_range(start=start_date, end=end_date, freq="D")
+        as_of_ts = pd.Timestamp(as_of) if as_of else pd.Timestamp.now().normalize()
+
+        blackout = EarningsWindowFilter.blackout_index().blackout_panel(dates, tickers)
+        filtered_days = blackout.sum(axis=0)
+        total_days = len(dates)
+
+        next_earnings = pd.DatetimeIndex(
+            EarningsWindowFilter.blackout_index().next_earnings(
+                tickers, np.full(len(tickers), as_of_ts)
+            )
+        )
+        borrow_rate = BorrowRateFilter.store().latest_rates(tickers).to_numpy()
+
+        return pd.DataFrame(
+            {
+                "ticker": tickers,
+                "total_days": total_days,
+                "trading_days": total_days - filtered_days,
+                "filtered_days": filtered_days,
+                "filter_ratio": filtered_days / total_days if total_days else np.nan,
+                "next_earnings": next_earnings,
+                "days_to_next_earnings": (next_earnings - as_of_ts).days,
+                "borrow_rate": borrow_rate,
+                "eligible_for_short": BorrowRateStore.short_eligible(borrow_rate),
+            }
+        )
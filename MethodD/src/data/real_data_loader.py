@@ -313,64 +313,37 @@ class CoveredCallPnLCalculator:
         """
         from src.pricing.bs_pricer import BlackScholesOption
 
-        results = {}
-
-        # 场景 1：涨（+3.1%）
-        exit_price_up = entry_price * 1.031
-        call_premium_paid_up = (
-            BlackScholesOption.call_price(
-                S=exit_price_up, K=strike_price, T=5 / 252, r=0.02, sigma=iv_exit
-            )
-            / 100
-        )
-
-        results["scenario_1_up"] = CoveredCallPnLCalculator.calculate_covered_call_pnl(
-            entry_price=entry_price,
-            exit_price=exit_price_up,
-            call_premium_received=call_premium_received,
-            call_premium_paid=call_premium_paid_up,
-            strike_price=strike_price,
-            shares=shares,
-        )
-
-        # 场景 2：横盘
-        exit_price_flat = entry_price
-        call_premium_paid_flat = (
-            BlackScholesOption.call_price(
-                S=exit_price_flat, K=strike_price, T=5 / 252, r=0.02, sigma=iv_exit
-            )
-            / 100
-        )
-
-        results["scenario_2_flat"] = (
-            CoveredCallPnLCalculator.calculate_covered_call_pnl(
-                entry_price=entry_price,
-                exit_price=exit_price_flat,
-                call_premium_received=call_premium_received,
-                call_premium_paid=call_premium_paid_flat,
-                strike_price=strike_price,
-                shares=shares,
-            )
-        )
-
-        # 场景 3：回调（-2.1%）
-        exit_price_down = entry_price * 0.979
-        call_premium_paid_down = (
-            BlackScholesOption.call_price(
-                S=exit_price_down, K=strike_price, T=5 / 252, r=0.02, sigma=iv_exit
-            )
+        scenarios = {
+            "scenario_1_up": 1.031,  # 涨（+3.1%）
+            "scenario_2_flat": 1.0,  # 横盘
+            "scenario_3_down": 0.979,  # 回调（-2.1%）
+        }
+        exit_prices = entry_price * np.array(list(scenarios.values()))
+
+        # 三个情景一次批量定价
+        call_premium_paid = (
+            BlackScholesOption.batch_price_greeks(
+                S=exit_prices,
+                K=strike_price,
+                T=5 / 252,
+                r=0.02,
+                sigma=iv_exit,
+                include_greeks=False,
+            )["price"]
             / 100
         )
 
-        results["scenario_3_down"] = (
-            CoveredCallPnLCalculator.calculate_covered_call_pnl(
+        results = {}
+        for name, exit_price, premium_paid in zip(
+            scenarios, exit_prices, call_premium_paid
+        ):
+            results[name] = CoveredCallPnLCalculator.calculate_covered_call_pnl(
                 entry_price=entry_price,
-                exit_price=exit_price_down,
+                exit_price=float(exit_price),
                 call_premium_received=call_premium_received,
-                call_premium_paid=call_premium_paid_down,
+                call_premium_paid=float(premium_paid),
                 strike_price=strike_price,
                 shares=shares,
             )
-        )
 
         return results
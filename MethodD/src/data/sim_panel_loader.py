@@ -0,0 +1,132 @@
+"""
+模拟数据集读取：scripts/generate_sim_data.py 生成的 nasdaq_full 数据
+"""
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+SIM_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    "data",
+    "simulated",
+    "nasdaq_full",
+)
+DEFAULT_VERSION = "v1"
+UNIVERSE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    "data",
+    "universe",
+    "nasdaq",
+    "universe.csv",
+)
+
+
+def resolve_dataset_dir(version: str = DEFAULT_VERSION) -> str:
+    return os.path.join(SIM_DATA_DIR, version)
+
+
+def load_universe_meta(version: str = DEFAULT_VERSION) -> pd.DataFrame:
+    """
+    读取 universe_meta.csv
+
+    返回:
+        DataFrame: ticker / mcap / beta / log_mcap
+    """
+    path = os.path.join(resolve_dataset_dir(version), "universe_meta.csv")
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"缺少 universe_meta.csv: {path}（先运行 scripts/generate_sim_data.py）"
+        )
+    meta = pd.read_csv(path)
+    meta["ticker"] = meta["ticker"].astype(str)
+    meta["log_mcap"] = np.log(meta["mcap"].astype(float))
+    return meta[["ticker", "mcap", "beta", "log_mcap"]]
+
+
+def load_universe_tickers(path: str = UNIVERSE_PATH) -> List[str]:
+    """读取 universe.csv 的 ticker 列（去空、去重，保持原顺序）"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"缺少 universe.csv: {path}")
+    universe = pd.read_csv(path)
+    if "ticker" not in universe.columns:
+        raise ValueError("universe.csv 缺少 ticker 列")
+    tickers = universe["ticker"].dropna().astype(str)
+    return list(dict.fromkeys(tickers))
+
+
+def _read_partitions(
+    name: str,
+    columns: List[str],
+    version: str = DEFAULT_VERSION,
+    tickers: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """读取 <name>/ticker=<T>.parquet 分区（tickers 为 None 时读全部）"""
+    part_dir = os.path.join(resolve_dataset_dir(version), name)
+    if not os.path.isdir(part_dir):
+        raise FileNotFoundError(
+            f"缺少 {name} 分区: {part_dir}（先运行 scripts/generate_sim_data.py）"
+        )
+    if tickers is None:
+        paths = sorted(
+            os.path.join(part_dir, item)
+            for item in os.listdir(part_dir)
+            if item.endswith(".parquet")
+        )
+    else:
+        paths = [
+            os.path.join(part_dir, f"ticker={ticker}.parquet") for ticker in tickers
+        ]
+    frames = [pd.read_parquet(path, columns=columns) for path in paths]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_sim_panel(
+    name: str,
+    value_col: str,
+    version: str = DEFAULT_VERSION,
+    tickers: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    分区数据转宽表
+
+    参数:
+        name: 分区名（prices / iv / targets）
+        value_col: 取值列（如 close / iv）
+
+    返回:
+        DataFrame: 日期 × 标的
+    """
+    long_df = _read_partitions(name, ["date", "ticker", value_col], version, tickers)
+    long_df["date"] = pd.to_datetime(long_df["date"])
+    return long_df.pivot(index="date", columns="ticker", values=value_col).sort_index()
+
+
+def load_sim_option_premiums(
+    tenor_days: int = 7,
+    version: str = DEFAULT_VERSION,
+    tickers: Optional[Sequence[str]] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    options 分区中指定期限的 ATM 权利金
+
+    返回:
+        Tuple: (call 权利金宽表, put 权利金宽表)，日期 × 标的
+    """
+    long_df = _read_partitions(
+        "options",
+        ["date", "ticker", "tenor_days", "call_premium", "put_premium"],
+        version,
+        tickers,
+    )
+    long_df = long_df[long_df["tenor_days"] == tenor_days].copy()
+    long_df["date"] = pd.to_datetime(long_df["date"])
+    wide = long_df.pivot(
+        index="date", columns="ticker", values=["call_premium", "put_premium"]
+    ).sort_index()
+    return wide["call_premium"], wide["put_premium"]
@@ -4,7 +4,12 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from src.factor.rolling_stats import rolling_median_mad, rolling_median_mad_multi
+
+
+FACTOR_FAMILY_WINDOWS = (5, 10, 20, 60)
 
 
 class IVFactorDefinition:
@@ -26,19 +31,95 @@ class IVFactorDefinition:
         Version B（研究版稳健标准化）：使用 MAD（中位绝对偏差）
         z_t = (IV_t - median(IV_{t-window..t})) / MAD(IV_{t-window..t})
         其中 MAD = median(|x - median(x)|)
+        （median 与 MAD 由有序滑动窗口一次增量计算，口径同 min_periods=1）
         """
-
-        def mad(x):
-            """计算中位绝对偏差"""
-            median = np.median(x)
-            return np.median(np.abs(x - median))
-
-        median_iv = iv_series.rolling(window=window, min_periods=1).median()
-        mad_iv = iv_series.rolling(window=window, min_periods=1).apply(mad, raw=True)
+        median_iv, mad_iv = rolling_median_mad(iv_series, window)
 
         factor = (iv_series - median_iv) / (mad_iv + 1e-8)
         return factor
 
+    @staticmethod
+    def compute_factor_panel(
+        iv_panel: Union[pd.DataFrame, np.ndarray],
+        window: int = 10,
+        dtype: type = np.float64,
+    ) -> Dict[str, Union[pd.DataFrame, np.ndarray]]:
+        """
+        面板模式：对宽表（日期 × 标的）一次性计算全部标的的 Version A / B
+
+        参数:
+            iv_panel: IV 宽表 DataFrame 或二维数组
+            window: 滚动窗口
+            dtype: 输出精度（计算按 float64，输出可选 np.float32 以节省内存）
+
+        返回:
+            Dict: {'factor_a': ..., 'factor_b': ...}，类型与输入一致；
+            逐列结果与 compute_factor_version_a/b 相同
+        """
+        values = np.asarray(iv_panel, dtype=float)
+        if values.ndim != 2:
+            raise ValueError("iv_panel 必须是二维（日期 × 标的）")
+        median_iv, mad_iv = rolling_median_mad(values, window)
+
+        factors = {
+            "factor_a": (values - median_iv) / (median_iv + 1e-8),
+            "factor_b": (values - median_iv) / (mad_iv + 1e-8),
+        }
+        for name, factor in factors.items():
+            factor = factor.astype(dtype, copy=False)
+            if isinstance(iv_panel, pd.DataFrame):
+                factor = pd.DataFrame(
+                    factor, index=iv_panel.index, columns=iv_panel.columns
+                )
+            factors[name] = factor
+        return factors
+
+    @staticmethod
+    def compute_factor_family(
+        iv_panel: Union[pd.DataFrame, pd.Series],
+        windows: Sequence[int] = FACTOR_FAMILY_WINDOWS,
+        dtype: type = np.float64,
+    ) -> pd.DataFrame:
+        """
+        因子族：多个窗口 × 两种标准化，一次时间扫描算完
+
+        参数:
+            iv_panel: IV 宽表（日期 × 标的）或单个标的的 Series
+            windows: 窗口列表
+            dtype: value 列精度
+
+        返回:
+            DataFrame: 长表 date / ticker / window / version（'A' / 'B'）/ value，
+            可直接按 (window, version) 分组做 IC 评估
+        """
+        if isinstance(iv_panel, pd.Series):
+            iv_panel = iv_panel.to_frame(iv_panel.name or "iv")
+        values = iv_panel.to_numpy(dtype=float)
+        n_dates, n_tickers = values.shape
+        dates = np.repeat(iv_panel.index.to_numpy(), n_tickers)
+        tickers = np.tile(iv_panel.columns.to_numpy(), n_dates)
+
+        frames = []
+        for window, (median_iv, mad_iv) in rolling_median_mad_multi(
+            values, windows
+        ).items():
+            for version, factor in [
+                ("A", (values - median_iv) / (median_iv + 1e-8)),
+                ("B", (values - median_iv) / (mad_iv + 1e-8)),
+            ]:
+                frames.append(
+                    pd.DataFrame(
+                        {
+                            "date": dates,
+                            "ticker": tickers,
+                            "window": window,
+                            "version": version,
+                            "value": factor.ravel().astype(dtype, copy=False),
+                        }
+                    )
+                )
+        return pd.concat(frames, ignore_index=True)
+
     @staticmethod
     def compute_both_versions(iv_series: pd.Series, window: int = 10) -> pd.DataFrame:
         """计算两个版本的因子"""
@@ -82,6 +163,45 @@ class FactorBucketizer:
 
         return {"top": top_indices, "bottom": bottom_indices}
 
+    @staticmethod
+    def bucketize_panel(factor_panel: pd.DataFrame, n_buckets: int = 5) -> pd.DataFrame:
+        """
+        宽表（日期 × 标的）逐日横截面分组
+
+        每个日期内按因子排名等分为 n_buckets 组（0 到 n_buckets-1），NaN 不参与
+        """
+        ranks = factor_panel.rank(axis=1, method="first")
+        counts = factor_panel.notna().sum(axis=1)
+        buckets = np.floor((ranks.sub(1)).mul(n_buckets).div(counts, axis=0))
+        return buckets
+
+    @staticmethod
+    def bucketize_cross_section(
+        df: pd.DataFrame,
+        value_col: str = "value",
+        date_col: str = "date",
+        group_cols: Optional[List[str]] = None,
+        n_buckets: int = 5,
+    ) -> pd.Series:
+        """
+        长表逐日横截面分组（groupby-rank，一次完成所有日期）
+
+        参数:
+            df: 长表（如 compute_factor_family 的输出）
+            value_col: 因子列
+            date_col: 日期列
+            group_cols: 额外分组列（如 ['window', 'version']）
+            n_buckets: 分组数量
+
+        返回:
+            Series: 分组标签（0 到 n_buckets-1，NaN 因子为 NaN）
+        """
+        keys = [date_col] + list(group_cols or [])
+        grouped = df.groupby(keys, sort=False)[value_col]
+        ranks = grouped.rank(method="first")
+        counts = grouped.transform("count")
+        return np.floor((ranks - 1) * n_buckets / counts)
+
 
 class FactorNeutralizer:
     """因子中性化（可选）"""
@@ -100,14 +220,71 @@ class FactorNeutralizer:
         返回:
             Series: 中性化后的因子
         """
-        # 简单的线性回归中性化
-        from sklearn.linear_model import LinearRegression
+        # 简单的线性回归中性化（带截距的最小二乘）
+        X = np.column_stack(
+            [np.ones(len(market_cap)), np.log(market_cap.values.astype(float))]
+        )
+        y = factor_series.values.astype(float)
+        coef = np.linalg.lstsq(X, y, rcond=None)[0]
+        residuals = y - X @ coef
+
+        return pd.Series(residuals, index=factor_series.index)
+
+    @staticmethod
+    def neutralize_cross_section(
+        df: pd.DataFrame,
+        value_col: str = "value",
+        control_cols: Sequence[str] = ("log_mcap", "beta", "moneyness"),
+        date_col: str = "date",
+        group_cols: Optional[List[str]] = None,
+    ) -> pd.Series:
+        """
+        逐日横截面回归取残差：所有日期的最小二乘一次批量求解
 
-        X = np.log(market_cap.values).reshape(-1, 1)
-        y = factor_series.values
+        每个日期（及 group_cols）内做 value ~ 1 + controls 的 OLS；
+        按组累加 X'X、X'y 后用 np.linalg 对堆叠的小矩阵批量求解
 
-        model = LinearRegression()
-        model.fit(X, y)
-        residuals = y - model.predict(X)
+        参数:
+            df: 长表，需包含 value_col、control_cols 与日期列
+            value_col: 因子列
+            control_cols: 控制变量列（缺失的列会被跳过）
+            date_col: 日期列
+            group_cols: 额外分组列（如 ['window', 'version']）
 
-        return pd.Series(residuals, index=factor_series.index)
+        返回:
+            Series: 残差（值或控制变量缺失、组内样本数不超过参数个数时为 NaN）
+        """
+        controls = [col for col in control_cols if col in df.columns]
+        keys = [date_col] + list(group_cols or [])
+        y = df[value_col].to_numpy(dtype=float)
+        X = np.column_stack(
+            [np.ones(len(df))] + [df[col].to_numpy(dtype=float) for col in controls]
+        )
+        valid = np.isfinite(y) & np.isfinite(X).all(axis=1)
+        codes = df.groupby(keys, sort=False).ngroup().to_numpy()
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+        k = X.shape[1]
+
+        Xv = np.where(valid[:, None], X, 0.0)
+        yv = np.where(valid, y, 0.0)
+        xtx = np.zeros((n_groups, k, k))
+        xty = np.zeros((n_groups, k))
+        np.add.at(xtx, codes, Xv[:, :, None] * Xv[:, None, :])
+        np.add.at(xty, codes, Xv * yv[:, None])
+        group_n = np.bincount(codes[valid], minlength=n_groups)
+
+        # pinv 兼容控制变量在组内共线（如当日 beta 全相同）的情况
+        coef = np.einsum("gij,gj->gi", np.linalg.pinv(xtx), xty)
+        fitted = np.einsum("ni,ni->n", X, coef[codes])
+        residuals = np.where(valid & (group_n[codes] > k), y - fitted, np.nan)
+        return pd.Series(residuals, index=df.index)
+
+    @staticmethod
+    def attach_controls(
+        df: pd.DataFrame, universe_meta: pd.DataFrame, ticker_col: str = "ticker"
+    ) -> pd.DataFrame:
+        """按 ticker 合并 universe_meta 的 log_mcap / beta 控制变量"""
+        meta = universe_meta[["ticker", "log_mcap", "beta"]].rename(
+            columns={"ticker": ticker_col}
+        )
+        return df.merge(meta, on=ticker_col, how="left")
@@ -0,0 +1,130 @@
+"""
+IV 因子的增量状态：逐条更新 IV，直接输出当期 Version A / B 因子值
+
+口径与 IVFactorDefinition.compute_factor_version_a/b（window, min_periods=1）一致，
+状态可序列化为 JSON，供定时采集在两次运行之间保存
+"""
+
+import json
+import math
+import os
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+NAN = float("nan")
+
+
+def _kth_of_two(
+    a: Callable[[int], float], len_a: int, b: Callable[[int], float], len_b: int, k: int
+) -> float:
+    """两个升序序列合并后的第 k 小（0 起），O(log) 次比较"""
+    lo, hi = max(0, k + 1 - len_b), min(k + 1, len_a)
+    while lo <= hi:
+        i = (lo + hi) // 2
+        j = k + 1 - i
+        if i < len_a and j > 0 and b(j - 1) > a(i):
+            lo = i + 1
+        elif i > 0 and j < len_b and a(i - 1) > b(j):
+            hi = i - 1
+        else:
+            left_a = a(i - 1) if i > 0 else -math.inf
+            left_b = b(j - 1) if j > 0 else -math.inf
+            return max(left_a, left_b)
+    raise ValueError("k 超出范围")
+
+
+class IVFactorState:
+    """单个标的的滚动窗口状态（最近 window 个 IV）"""
+
+    def __init__(self, window: int = 10):
+        if window < 1:
+            raise ValueError("window 必须 >= 1")
+        self.window = window
+        self._recent = deque()
+        self._ordered: List[float] = []
+        self._nan_count = 0
+
+    def _median(self) -> float:
+        ordered = self._ordered
+        m = len(ordered)
+        return (ordered[(m - 1) // 2] + ordered[m // 2]) / 2
+
+    def _mad(self, median: float) -> float:
+        """|x - median| 的中位数：中位数两侧的偏差各自有序，取两序列合并后的第 k 小"""
+        ordered = self._ordered
+        split = bisect_left(ordered, median)
+
+        def left(i: int) -> float:
+            return abs(ordered[split - 1 - i] - median)
+
+        def right(j: int) -> float:
+            return abs(ordered[split + j] - median)
+
+        m = len(ordered)
+        len_left, len_right = split, m - split
+        lo = _kth_of_two(left, len_left, right, len_right, (m - 1) // 2)
+        hi = _kth_of_two(left, len_left, right, len_right, m // 2)
+        return (lo + hi) / 2
+
+    def update(self, iv: Optional[float]) -> Dict[str, float]:
+        """
+        追加一期 IV 并返回当期因子
+
+        返回:
+            Dict: iv / median / mad / factor_a / factor_b（无法计算时为 NaN）
+        """
+        value = NAN if iv is None else float(iv)
+        self._recent.append(value)
+        if math.isnan(value):
+            self._nan_count += 1
+        else:
+            insort(self._ordered, value)
+        if len(self._recent) > self.window:
+            old = self._recent.popleft()
+            if math.isnan(old):
+                self._nan_count -= 1
+            else:
+                del self._ordered[bisect_left(self._ordered, old)]
+
+        median = self._median() if self._ordered else NAN
+        mad = self._mad(median) if self._ordered and self._nan_count == 0 else NAN
+        return {
+            "iv": value,
+            "median": median,
+            "mad": mad,
+            "factor_a": (value - median) / (median + 1e-8),
+            "factor_b": (value - median) / (mad + 1e-8),
+        }
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "window": self.window,
+            "recent": [None if math.isnan(v) else v for v in self._recent],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, object]) -> "IVFactorState":
+        state = cls(window=int(payload["window"]))
+        for value in payload.get("recent", []):
+            state.update(value)
+        return state
+
+
+def load_factor_states(path: str) -> Dict[str, IVFactorState]:
+    """读取各标的的因子状态（文件不存在时返回空字典）"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        payload = json.load(file)
+    return {ticker: IVFactorState.from_dict(item) for ticker, item in payload.items()}
+
+
+def save_factor_states(states: Dict[str, IVFactorState], path: str) -> None:
+    """写入各标的的因子状态（先写临时文件再替换，避免中断时损坏）"""
+    payload = {ticker: state.to_dict() for ticker, state in sorted(states.items())}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(payload, file, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,364 @@
+"""
+价格指标的流式状态：每来一根日线 O(1) 更新，不再重算整段历史
+
+- EMAState：逐步复现 pandas ewm(adjust=False)
+- MACDState：快 / 慢 / 信号线 + 交叉标记 + 快线斜率
+- RollingMeanStdState：环形缓冲 + 去中心化的滚动和（Bollinger、中线、MA200）
+- ATRState：简单移动平均（与 price_factors.compute_atr 一致）或 Wilder 平滑
+- PriceIndicatorState：组合上述状态，输出与 lookup_indicators 相同的字段
+
+所有状态都用 __slots__，to_dict / from_dict 可 JSON 往返（NaN 原样写入）。
+与 compute_indicator_table 的差异在浮点误差量级；窗口内取值完全相同时标准差
+直接取 0（pandas 可能留下舍入残差）
+"""
+
+import json
+import math
+import os
+from typing import Dict, Optional
+
+from src.factor.price_factors import INDICATOR_DEFAULTS
+
+
+NAN = float("nan")
+
+
+class _StreamingState:
+    """__slots__ 状态的通用序列化；_nested 声明嵌套的子状态字段"""
+
+    __slots__ = ()
+    _nested: Dict[str, type] = {}
+
+    def to_dict(self) -> Dict[str, object]:
+        payload = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if name in self._nested and value is not None:
+                value = value.to_dict()
+            elif isinstance(value, list):
+                value = list(value)
+            payload[name] = value
+        return payload
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, object]) -> "_StreamingState":
+        state = cls.__new__(cls)
+        for name in cls.__slots__:
+            value = payload[name]
+            if name in cls._nested and value is not None:
+                value = cls._nested[name].from_dict(value)
+            setattr(state, name, value)
+        return state
+
+
+class EMAState(_StreamingState):
+    """pandas ewm(span, adjust=False).mean() 的逐步版本（含 NaN 处理）"""
+
+    __slots__ = ("alpha", "weighted", "old_wt")
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1.0)
+        self.weighted = NAN
+        self.old_wt = 1.0
+
+    def update(self, value: float) -> float:
+        observed = not math.isnan(value)
+        if not math.isnan(self.weighted):
+            self.old_wt *= 1.0 - self.alpha
+            if observed:
+                if self.weighted != value:
+                    self.weighted = (
+                        self.old_wt * self.weighted + self.alpha * value
+                    ) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif observed:
+            self.weighted = value
+        return self.weighted
+
+
+class MACDState(_StreamingState):
+    """MACD 柱体、金叉 / 死叉标记与快线斜率"""
+
+    __slots__ = (
+        "fast",
+        "slow",
+        "signal",
+        "count",
+        "prev_diff",
+        "prev_fast",
+        "min_count",
+    )
+    _nested = {"fast": EMAState, "slow": EMAState, "signal": EMAState}
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+        self.count = 0
+        self.prev_diff = NAN
+        self.prev_fast = NAN
+        self.min_count = slow + signal
+
+    def update(self, close: float) -> Dict[str, float]:
+        ema_fast = self.fast.update(close)
+        macd = ema_fast - self.slow.update(close)
+        diff = macd - self.signal.update(macd)
+        self.count += 1
+
+        cross_flag = 0
+        fast_slope = NAN
+        if self.count >= self.min_count:
+            if self.prev_diff <= 0 < diff:
+                cross_flag = 1
+            elif self.prev_diff >= 0 > diff:
+                cross_flag = -1
+            fast_slope = ema_fast - self.prev_fast
+        self.prev_diff = diff
+        self.prev_fast = ema_fast
+        return {
+            "macd_hist": diff,
+            "macd_cross_flag": cross_flag,
+            "macd_fast_slope": fast_slope,
+        }
+
+
+class RollingMeanStdState(_StreamingState):
+    """
+    定长窗口均值与总体标准差（ddof=0）
+
+    环形缓冲保存窗口内的值，滚动和按中心 center 去均值累加；每满一个窗口用
+    math.fsum 重新定中心并重算一次，误差不随时间累积（摊还 O(1)）
+    """
+
+    __slots__ = (
+        "window",
+        "buffer",
+        "pos",
+        "count",
+        "center",
+        "total",
+        "total_sq",
+        "since_refresh",
+        "last_value",
+        "run_length",
+    )
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buffer = []
+        self.pos = 0
+        self.count = 0
+        self.center = NAN
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.since_refresh = 0
+        self.last_value = NAN
+        self.run_length = 0
+
+    def _refresh(self) -> None:
+        self.center = math.fsum(self.buffer) / len(self.buffer)
+        self.total = math.fsum(v - self.center for v in self.buffer)
+        self.total_sq = math.fsum((v - self.center) ** 2 for v in self.buffer)
+        self.since_refresh = 0
+
+    def update(self, value: float) -> None:
+        if math.isnan(self.center):
+            self.center = value
+        if len(self.buffer) < self.window:
+            self.buffer.append(value)
+        else:
+            old = self.buffer[self.pos] - self.center
+            self.total -= old
+            self.total_sq -= old * old
+            self.buffer[self.pos] = value
+            self.pos = (self.pos + 1) % self.window
+        shifted = value - self.center
+        self.total += shifted
+        self.total_sq += shifted * shifted
+        self.count += 1
+        self.run_length = self.run_length + 1 if value == self.last_value else 1
+        self.last_value = value
+        self.since_refresh += 1
+        if self.since_refresh >= self.window:
+            self._refresh()
+
+    def mean_std(self):
+        """窗口未满时为 (NaN, NaN)；窗口内取值全同时为 (该值, 0)"""
+        if self.count < self.window:
+            return NAN, NAN
+        if self.run_length >= self.window:
+            return self.last_value, 0.0
+        mean = self.total / self.window
+        var = max(self.total_sq / self.window - mean * mean, 0.0)
+        return mean + self.center, math.sqrt(var)
+
+
+class ATRState(_StreamingState):
+    """ATR：method='simple' 为 TR 的简单移动平均，'wilder' 为 Wilder 平滑"""
+
+    __slots__ = ("window", "method", "prev_close", "tr_mean", "atr", "count")
+    _nested = {"tr_mean": RollingMeanStdState}
+
+    def __init__(self, window: int = 20, method: str = "simple"):
+        if method not in ("simple", "wilder"):
+            raise ValueError(f"Unknown ATR method: {method}")
+        self.window = window
+        self.method = method
+        self.prev_close = NAN
+        self.tr_mean = RollingMeanStdState(window)
+        self.atr = NAN
+        self.count = 0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        # 与 pandas max(axis=1) 一致：忽略 NaN 分量（首根 K 线只有 high-low）
+        parts = [
+            abs(high - low),
+            abs(high - self.prev_close),
+            abs(low - self.prev_close),
+        ]
+        parts = [part for part in parts if not math.isnan(part)]
+        tr = max(parts) if parts else NAN
+        self.prev_close = close
+        self.count += 1
+        self.tr_mean.update(tr)
+
+        if self.method == "simple":
+            self.atr = self.tr_mean.mean_std()[0]
+        elif self.count == self.window:
+            self.atr = self.tr_mean.mean_std()[0]
+        elif self.count > self.window:
+            self.atr = (self.atr * (self.window - 1) + tr) / self.window
+        return self.atr
+
+
+class PriceIndicatorState(_StreamingState):
+    """
+    单个标的的全部价格指标状态（口径同 price_factors / compute_indicator_table）
+
+    参数:
+        use_high_low: False 时 ATR 回退为收益率滚动标准差（对应缺 High/Low 的情况）
+    """
+
+    __slots__ = (
+        "bb",
+        "mid",
+        "ma_long",
+        "atr",
+        "ret_std",
+        "macd",
+        "use_high_low",
+        "prev_close",
+        "prev_mid_diff",
+        "last_date",
+        "last_values",
+    )
+    _nested = {
+        "bb": RollingMeanStdState,
+        "mid": RollingMeanStdState,
+        "ma_long": RollingMeanStdState,
+        "atr": ATRState,
+        "ret_std": RollingMeanStdState,
+        "macd": MACDState,
+    }
+
+    def __init__(
+        self,
+        use_high_low: bool = True,
+        bb_window: int = 20,
+        mid_window: int = 10,
+        atr_window: int = 20,
+        ma_window: int = 200,
+        fast: int = 12,
+        slow: int = 26,
+        signal: int = 9,
+        atr_method: str = "simple",
+    ):
+        self.bb = RollingMeanStdState(bb_window)
+        self.mid = RollingMeanStdState(mid_window)
+        self.ma_long = RollingMeanStdState(ma_window)
+        self.atr = ATRState(atr_window, method=atr_method) if use_high_low else None
+        self.ret_std = None if use_high_low else RollingMeanStdState(atr_window)
+        self.macd = MACDState(fast, slow, signal)
+        self.use_high_low = use_high_low
+        self.prev_close = NAN
+        self.prev_mid_diff = NAN
+        self.last_date = None
+        self.last_values = None
+
+    def update(
+        self,
+        close: float,
+        high: Optional[float] = None,
+        low: Optional[float] = None,
+        date: Optional[str] = None,
+    ) -> Optional[Dict[str, object]]:
+        """
+        追加一根日线，返回当期指标
+
+        date 不晚于已处理的最后日期时忽略该 K 线（返回 None），便于重复拉取
+        重叠区间；close 为 NaN 的 K 线同样跳过（与 dropna(subset=['Close']) 一致）
+        """
+        if date is not None and self.last_date is not None and date <= self.last_date:
+            return None
+        close = float(close)
+        if math.isnan(close):
+            return None
+        if date is not None:
+            self.last_date = date
+
+        self.bb.update(close)
+        self.mid.update(close)
+        self.ma_long.update(close)
+        if self.use_high_low:
+            atr = self.atr.update(float(high), float(low), close)
+        else:
+            ret = (
+                close / self.prev_close - 1 if not math.isnan(self.prev_close) else NAN
+            )
+            # 首期收益率为 NaN，窗口从第二根 K 线开始计数
+            if not math.isnan(ret):
+                self.ret_std.update(ret)
+            atr = self.ret_std.mean_std()[1]
+        self.prev_close = close
+
+        values = dict(INDICATOR_DEFAULTS)
+        ma, sd = self.bb.mean_std()
+        if not (math.isnan(ma) or math.isnan(sd) or sd == 0):
+            values["bb_pos"] = (close - ma) / (2 * sd)
+            values["bb_bw"] = (4 * sd) / ma if ma != 0 else NAN
+
+        mid, _ = self.mid.mean_std()
+        mid_diff = close - mid
+        if self.prev_mid_diff <= 0 < mid_diff:
+            values["bb_mid_flag"], values["bb_mid_side"] = 1, 1
+        elif self.prev_mid_diff >= 0 > mid_diff:
+            values["bb_mid_flag"], values["bb_mid_side"] = 1, -1
+        self.prev_mid_diff = mid_diff
+
+        values["atr"] = atr
+        ma_long, _ = self.ma_long.mean_std()
+        if not (math.isnan(ma_long) or math.isnan(atr) or atr == 0):
+            values["ma200_break"] = (close - ma_long) / atr
+        values.update(self.macd.update(close))
+        self.last_values = values
+        return values
+
+
+def load_indicator_states(path: str) -> Dict[str, PriceIndicatorState]:
+    """读取各标的的指标状态（文件不存在时返回空字典）"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        payload = json.load(file)
+    return {
+        ticker: PriceIndicatorState.from_dict(item) for ticker, item in payload.items()
+    }
+
+
+def save_indicator_states(states: Dict[str, PriceIndicatorState], path: str) -> None:
+    """写入各标的的指标状态（先写临时文件再替换）"""
+    payload = {ticker: state.to_dict() for ticker, state in sorted(states.items())}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(payload, file, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,156 @@
+"""
+多标的技术指标：在（日期 × 标的）矩阵上一次算完全部标的
+
+- 滚动均值 / 标准差：pandas rolling（按列向量化，与单点函数逐位一致）
+- EMA：时间方向递推、标的方向向量化，逐步复现 pandas ewm(adjust=False)
+- 交叉：前后两期差值的符号变化掩码
+
+每个 (日期, 标的) 的值等于把 price_factors 的单点函数作用在该标的截至该日的历史上
+（compute_indicator_table 的逐列版本）；滚动统计量与 EMA 都与单点函数逐位一致，
+标记类指标一致。NaN 视为缺失观测：窗口内有缺失时
+滚动指标为 NaN
+"""
+
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+Panel = Union[pd.DataFrame, np.ndarray]
+
+
+def _shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    shifted = np.full_like(values, np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:-periods]
+    return shifted
+
+
+def rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    滚动均值与总体标准差（ddof=0，min_periods=window）
+
+    直接用 pandas rolling（已按列向量化），与 compute_indicator_table 逐位一致，
+    包括均值接近收盘价时的符号与平坦窗口的舍入残差
+    """
+    rolling = pd.DataFrame(values, copy=False).rolling(window, min_periods=window)
+    return rolling.mean().to_numpy(), rolling.std(ddof=0).to_numpy()
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """逐步复现 pandas ewm(span, adjust=False).mean()（含 NaN 处理），标的方向向量化"""
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    n, c = values.shape
+    out = np.empty((n, c))
+    weighted = np.full(c, np.nan)
+    old_wt = np.ones(c)
+    for t in range(n):
+        cur = values[t]
+        observed = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+
+        old_wt = np.where(started, old_wt * decay, old_wt)
+        update = started & observed & (weighted != cur)
+        with np.errstate(invalid="ignore"):
+            blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update, blended, weighted)
+        old_wt = np.where(started & observed, 1.0, old_wt)
+        weighted = np.where(~started & observed, cur, weighted)
+        out[t] = weighted
+    return out
+
+
+def _cross_side(prev_diff: np.ndarray, curr_diff: np.ndarray) -> np.ndarray:
+    """上穿为 1，下穿为 -1，否则 0（NaN 视为无交叉）"""
+    up = (prev_diff <= 0) & (curr_diff > 0)
+    down = (prev_diff >= 0) & (curr_diff < 0)
+    return np.where(up, 1, np.where(down, -1, 0)).astype(np.int8)
+
+
+def compute_indicator_panel(
+    close: Panel,
+    high: Optional[Panel] = None,
+    low: Optional[Panel] = None,
+    bb_window: int = 20,
+    mid_window: int = 10,
+    atr_window: int = 20,
+    ma_window: int = 200,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+) -> Dict[str, Panel]:
+    """
+    全标的指标矩阵
+
+    参数:
+        close: 收盘价宽表（日期 × 标的）
+        high, low: 最高 / 最低价宽表（缺省时 ATR 回退为收益率波动）
+
+    返回:
+        Dict: bb_pos / bb_bw / bb_mid_flag / bb_mid_side / atr / ma200_break /
+        macd_hist / macd_cross_flag / macd_fast_slope，类型与 close 一致
+    """
+    x = np.asarray(close, dtype=float)
+    observed = np.cumsum(np.isfinite(x), axis=0)
+
+    # Bollinger
+    ma, sd = rolling_mean_std(x, bb_window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bb_ok = np.isfinite(ma) & np.isfinite(sd) & (sd != 0)
+        bb_pos = np.where(bb_ok, (x - ma) / (2 * sd), np.nan)
+        bb_bw = np.where(bb_ok & (ma != 0), (4 * sd) / ma, np.nan)
+
+    # 中线突破
+    mid, _ = rolling_mean_std(x, mid_window)
+    mid_diff = x - mid
+    mid_side = _cross_side(_shift(mid_diff), mid_diff)
+
+    # ATR
+    if high is not None and low is not None:
+        h = np.asarray(high, dtype=float)
+        lo = np.asarray(low, dtype=float)
+        prev_close = _shift(x)
+        tr = np.fmax(
+            np.fmax(np.abs(h - lo), np.abs(h - prev_close)), np.abs(lo - prev_close)
+        )
+        atr, _ = rolling_mean_std(tr, atr_window)
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = x / _shift(x) - 1
+        _, atr = rolling_mean_std(returns, atr_window)
+
+    ma_long, _ = rolling_mean_std(x, ma_window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ma200_break = np.where(
+            np.isfinite(ma_long) & np.isfinite(atr) & (atr != 0),
+            (x - ma_long) / atr,
+            np.nan,
+        )
+
+    # MACD
+    ema_fast = ema(x, fast)
+    macd = ema_fast - ema(x, slow)
+    macd_diff = macd - ema(macd, signal)
+    enough = observed >= slow + signal
+    macd_cross = np.where(enough, _cross_side(_shift(macd_diff), macd_diff), 0)
+    fast_slope = np.where(enough, ema_fast - _shift(ema_fast), np.nan)
+
+    result = {
+        "bb_pos": bb_pos,
+        "bb_bw": bb_bw,
+        "bb_mid_flag": (mid_side != 0).astype(np.int8),
+        "bb_mid_side": mid_side,
+        "atr": atr,
+        "ma200_break": ma200_break,
+        "macd_hist": macd_diff,
+        "macd_cross_flag": macd_cross.astype(np.int8),
+        "macd_fast_slope": fast_slope,
+    }
+    if isinstance(close, pd.DataFrame):
+        result = {
+            name: pd.DataFrame(values, index=close.index, columns=close.columns)
+            for name, values in result.items()
+        }
+    return result
@@ -1,8 +1,11 @@
 """
 价格因子：Bollinger、MA200 突破强度、MACD
+
+单点函数返回序列最后一期的值；compute_indicator_table 一次算出全历史各期的值，
+按快照时间用 lookup_indicators 做 as-of 查询
 """
 
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -103,6 +106,17 @@ def compute_ma200_break(close: pd.Series, atr: float, window: int = 200) -> floa
     return float((close.iloc[-1] - ma_last) / atr)
 
 
+def _macd_lines(
+    close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9
+) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """MACD 三条线：快线 EMA、MACD（快慢差）、信号线（每条 EMA 只算一次）"""
+    ema_fast = close.ewm(span=fast, adjust=False).mean()
+    ema_slow = close.ewm(span=slow, adjust=False).mean()
+    macd = ema_fast - ema_slow
+    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    return ema_fast, macd, signal_line
+
+
 def compute_macd_hist(
     close: pd.Series,
     fast: int = 12,
@@ -115,10 +129,7 @@ def compute_macd_hist(
     if close is None or close.empty:
         return float("nan")
     close = close.astype(float)
-    ema_fast = close.ewm(span=fast, adjust=False).mean()
-    ema_slow = close.ewm(span=slow, adjust=False).mean()
-    macd = ema_fast - ema_slow
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    _, macd, signal_line = _macd_lines(close, fast, slow, signal)
     hist = macd - signal_line
     return float(hist.iloc[-1])
 
@@ -140,10 +151,7 @@ def compute_macd_cross_fast_slope(
     if close is None or close.empty or len(close) < slow + signal:
         return 0, float("nan")
     close = close.astype(float)
-    ema_fast = close.ewm(span=fast, adjust=False).mean()
-    ema_slow = close.ewm(span=slow, adjust=False).mean()
-    macd = ema_fast - ema_slow
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    ema_fast, macd, signal_line = _macd_lines(close, fast, slow, signal)
     prev_diff = macd.iloc[-2] - signal_line.iloc[-2]
     curr_diff = macd.iloc[-1] - signal_line.iloc[-1]
     cross_flag = 0
@@ -153,3 +161,136 @@ def compute_macd_cross_fast_slope(
         cross_flag = -1
     fast_slope = float(ema_fast.iloc[-1] - ema_fast.iloc[-2])
     return cross_flag, fast_slope
+
+
+def _cross_side(prev_diff: pd.Series, curr_diff: pd.Series) -> pd.Series:
+    """上穿为 1，下穿为 -1，否则 0（与单点函数的比较口径一致，NaN 视为无交叉）"""
+    up = (prev_diff <= 0) & (curr_diff > 0)
+    down = (prev_diff >= 0) & (curr_diff < 0)
+    return pd.Series(np.where(up, 1, np.where(down, -1, 0)), index=curr_diff.index)
+
+
+def compute_indicator_table(
+    history: pd.DataFrame,
+    bb_window: int = 20,
+    mid_window: int = 10,
+    atr_window: int = 20,
+    ma_window: int = 200,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+) -> pd.DataFrame:
+    """
+    全历史指标表：每一行等于把单点函数作用在截至该行的历史上
+
+    参数:
+        history: 日线（Date / Close，可选 High / Low）
+
+    返回:
+        DataFrame: 以 Date 为索引（升序），列为 bb_pos / bb_bw / bb_mid_flag /
+        bb_mid_side / atr / ma200_break / macd_hist / macd_cross_flag /
+        macd_fast_slope
+    """
+    history = history.sort_values("Date")
+    index = pd.DatetimeIndex(pd.to_datetime(history["Date"]))
+    close = pd.Series(history["Close"].to_numpy(dtype=float), index=index)
+    position = np.arange(len(close))
+
+    # Bollinger（位置分数与带宽）
+    ma = close.rolling(window=bb_window, min_periods=bb_window).mean()
+    sd = close.rolling(window=bb_window, min_periods=bb_window).std(ddof=0)
+    bb_ok = ma.notna() & sd.notna() & (sd != 0)
+    bb_pos = ((close - ma) / (2 * sd)).where(bb_ok)
+    bb_bw = ((4 * sd) / ma).where(bb_ok & (ma != 0))
+
+    # 中线突破
+    mid = close.rolling(window=mid_window, min_periods=mid_window).mean()
+    mid_diff = close - mid
+    mid_side = _cross_side(mid_diff.shift(1), mid_diff)
+    mid_side = mid_side.where(
+        (position >= mid_window) & mid.notna() & mid.shift(1).notna(), 0
+    )
+
+    # ATR（缺 High / Low 时回退为收益率波动）
+    if "High" in history.columns and "Low" in history.columns:
+        high = pd.Series(history["High"].to_numpy(dtype=float), index=index)
+        low = pd.Series(history["Low"].to_numpy(dtype=float), index=index)
+        prev_close = close.shift(1)
+        tr = pd.concat(
+            [
+                (high - low).abs(),
+                (high - prev_close).abs(),
+                (low - prev_close).abs(),
+            ],
+            axis=1,
+        ).max(axis=1)
+        atr = tr.rolling(window=atr_window, min_periods=atr_window).mean()
+    else:
+        atr = (
+            close.pct_change()
+            .rolling(window=atr_window, min_periods=atr_window)
+            .std(ddof=0)
+        )
+
+    ma_long = close.rolling(window=ma_window, min_periods=ma_window).mean()
+    ma200_break = ((close - ma_long) / atr).where(
+        ma_long.notna() & atr.notna() & (atr != 0)
+    )
+
+    # MACD
+    ema_fast, macd, signal_line = _macd_lines(close, fast, slow, signal)
+    macd_diff = macd - signal_line
+    enough = position >= slow + signal - 1
+    macd_cross = _cross_side(macd_diff.shift(1), macd_diff).where(enough, 0)
+    fast_slope = ema_fast.diff().where(enough)
+
+    return pd.DataFrame(
+        {
+            "bb_pos": bb_pos,
+            "bb_bw": bb_bw,
+            "bb_mid_flag": (mid_side != 0).astype(int),
+            "bb_mid_side": mid_side.astype(int),
+            "atr": atr,
+            "ma200_break": ma200_break,
+            "macd_hist": macd_diff,
+            "macd_cross_flag": macd_cross.astype(int),
+            "macd_fast_slope": fast_slope,
+        },
+        index=index,
+    )
+
+
+INDICATOR_DEFAULTS = {
+    "bb_pos": float("nan"),
+    "bb_bw": float("nan"),
+    "bb_mid_flag": 0,
+    "bb_mid_side": 0,
+    "atr": float("nan"),
+    "ma200_break": float("nan"),
+    "macd_hist": float("nan"),
+    "macd_cross_flag": 0,
+    "macd_fast_slope": float("nan"),
+}
+
+
+def lookup_indicators(
+    table: Optional[pd.DataFrame], as_of: object
+) -> Dict[str, object]:
+    """
+    as-of 查询：取日期不晚于 as_of 当天的最后一行（二分查找）
+
+    表为空或 as_of 早于全部历史时返回与空历史相同的默认值
+    """
+    if table is None or table.empty or as_of is None:
+        return dict(INDICATOR_DEFAULTS)
+    as_of_ts = pd.Timestamp(as_of)
+    if as_of_ts.tzinfo is not None:
+        as_of_ts = as_of_ts.tz_convert("UTC").tz_localize(None)
+    position = table.index.searchsorted(as_of_ts.normalize(), side="right") - 1
+    if position < 0:
+        return dict(INDICATOR_DEFAULTS)
+    row = table.iloc[position]
+    return {
+        name: (int(row[name]) if isinstance(default, int) else float(row[name]))
+        for name, default in INDICATOR_DEFAULTS.items()
+    }
@@ -0,0 +1,203 @@
+"""
+滑动窗口顺序统计：增量维护的有序窗口，计算 rolling median / MAD
+
+- 每个时间步只删除离开窗口的一个元素、插入新元素，不对窗口重新排序
+- 列方向（tickers）全向量化，支持 1 维序列和 2 维（日期 × 标的）面板
+- 多个窗口在同一次时间扫描中同步滑动
+- 与 pandas rolling(window, min_periods=1) 的结果逐元素一致：
+  median 忽略 NaN；MAD 与 rolling.apply(mad, raw=True) 相同，窗口内有 NaN 时为 NaN
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+ArrayLike = Union[pd.Series, pd.DataFrame, np.ndarray]
+
+
+def _slide_sorted(
+    values: np.ndarray, new: np.ndarray, old: np.ndarray, rows: np.ndarray
+) -> np.ndarray:
+    """
+    有序窗口滑动一步（每列各自）：删除一个等于 old 的元素，再插入 new
+
+    值相同的元素可互换，按值定位即可，不需要记录元素的时间下标
+    """
+    pad = np.full((1, values.shape[1]), np.inf)
+    drop = np.count_nonzero(values < old, axis=0)
+    rem = np.where(rows[:-1] >= drop, values[1:], values[:-1])
+    pos = np.count_nonzero(rem < new, axis=0)
+    return np.where(
+        rows < pos,
+        np.vstack([rem, pad]),
+        np.where(rows == pos, new, np.vstack([pad, rem])),
+    )
+
+
+def _rolling_median_mad_2d(
+    x: np.ndarray, windows: Sequence[int], with_mad: bool = True
+) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """
+    二维 (n, c) 内核：一次时间扫描，所有窗口的有序状态同步滑动
+
+    返回:
+        Dict: {window: (median, mad)}，形状与 x 相同
+    """
+    n, c = x.shape
+    is_nan = np.isnan(x)
+    # NaN 与占位元素都按 +inf 排在窗口末尾，用 nan_count 区分有效个数
+    key = np.where(is_nan, np.inf, x)
+    placeholder = np.full(c, np.inf)
+    cols = np.arange(c)
+
+    states = {w: np.full((w, c), np.inf) for w in windows}
+    nan_counts = {w: np.zeros(c, dtype=np.int64) for w in windows}
+    rows = {w: np.arange(w)[:, None] for w in windows}
+    results = {w: (np.full((n, c), np.nan), np.full((n, c), np.nan)) for w in windows}
+
+    for t in range(n):
+        for w in windows:
+            old = key[t - w] if t >= w else placeholder
+            values = _slide_sorted(states[w], key[t], old, rows[w])
+            states[w] = values
+
+            nan_count = nan_counts[w]
+            nan_count += is_nan[t]
+            if t >= w:
+                nan_count -= is_nan[t - w]
+            size = min(t + 1, w)
+            m = size - nan_count
+            lo = np.maximum((m - 1) // 2, 0)
+            hi = np.maximum(m // 2, 0)
+            med = (values[lo, cols] + values[hi, cols]) / 2
+            median, mad = results[w]
+            median[t] = np.where(m > 0, med, np.nan)
+
+            if with_mad:
+                full = nan_count == 0
+                if full.any():
+                    with np.errstate(invalid="ignore"):
+                        dev = np.abs(values[:size] - med)
+                    k_lo, k_hi = (size - 1) // 2, size // 2
+                    part = np.partition(dev, [k_lo, k_hi], axis=0)
+                    mad[t] = np.where(full, (part[k_lo] + part[k_hi]) / 2, np.nan)
+    return results
+
+
+def _sorted_median(ordered: List[float]) -> float:
+    m = len(ordered)
+    return (ordered[(m - 1) // 2] + ordered[m // 2]) / 2
+
+
+def _rolling_median_mad_1d(
+    x: np.ndarray, window: int, with_mad: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """单列内核：bisect 维护有序列表（单列时比按列向量化的步进更省开销）"""
+    n = x.size
+    median = np.full(n, np.nan)
+    mad = np.full(n, np.nan)
+    recent = deque()
+    ordered: List[float] = []
+    nan_count = 0
+    for t, value in enumerate(x.tolist()):
+        recent.append(value)
+        if value != value:
+            nan_count += 1
+        else:
+            insort(ordered, value)
+        if len(recent) > window:
+            old = recent.popleft()
+            if old != old:
+                nan_count -= 1
+            else:
+                del ordered[bisect_left(ordered, old)]
+        if not ordered:
+            continue
+        med = _sorted_median(ordered)
+        median[t] = med
+        if with_mad and nan_count == 0:
+            mad[t] = _sorted_median(sorted(abs(v - med) for v in ordered))
+    return median, mad
+
+
+def _rolling_kernel(
+    data: ArrayLike, window: int, with_mad: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    if window < 1:
+        raise ValueError("window 必须 >= 1")
+    arr = _as_2d(data)
+    if arr.shape[1] == 1:
+        median, mad = _rolling_median_mad_1d(arr[:, 0], window, with_mad)
+        return median[:, None], mad[:, None]
+    return _rolling_median_mad_2d(arr, [window], with_mad)[window]
+
+
+def _as_2d(data: ArrayLike) -> np.ndarray:
+    arr = np.asarray(data, dtype=float)
+    if arr.ndim == 1:
+        return arr[:, None]
+    if arr.ndim != 2:
+        raise ValueError("只支持 1 维或 2 维输入")
+    return arr
+
+
+def _wrap(result: np.ndarray, data: ArrayLike) -> ArrayLike:
+    if isinstance(data, pd.Series):
+        return pd.Series(result[:, 0], index=data.index, name=data.name)
+    if isinstance(data, pd.DataFrame):
+        return pd.DataFrame(result, index=data.index, columns=data.columns)
+    return result[:, 0] if np.ndim(data) == 1 else result
+
+
+def rolling_median_mad(data: ArrayLike, window: int) -> Tuple[ArrayLike, ArrayLike]:
+    """
+    一次滑动同时得到 rolling median 和 MAD（min_periods=1 口径）
+
+    参数:
+        data: Series / DataFrame（日期 × 标的）/ 1 维或 2 维数组
+        window: 窗口长度
+
+    返回:
+        Tuple: (median, mad)，类型与输入一致
+    """
+    median, mad = _rolling_kernel(data, window)
+    return _wrap(median, data), _wrap(mad, data)
+
+
+def rolling_median(data: ArrayLike, window: int) -> ArrayLike:
+    """rolling(window, min_periods=1).median() 的等价实现"""
+    median, _ = _rolling_kernel(data, window, with_mad=False)
+    return _wrap(median, data)
+
+
+def rolling_mad(data: ArrayLike, window: int) -> ArrayLike:
+    """rolling(window, min_periods=1).apply(mad, raw=True) 的等价实现"""
+    return rolling_median_mad(data, window)[1]
+
+
+def rolling_median_mad_multi(
+    data: ArrayLike, windows: Sequence[int]
+) -> Dict[int, Tuple[ArrayLike, ArrayLike]]:
+    """
+    一次扫描同时得到多个窗口的 rolling median / MAD（min_periods=1 口径）
+
+    参数:
+        data: Series / DataFrame（日期 × 标的）/ 1 维或 2 维数组
+        windows: 窗口长度列表
+
+    返回:
+        Dict: {window: (median, mad)}，各结果类型与输入一致，
+        与逐窗口调用 rolling_median_mad 的结果相同
+    """
+    windows = sorted(set(int(w) for w in windows))
+    if not windows or windows[0] < 1:
+        raise ValueError("windows 不能为空且必须 >= 1")
+    results = _rolling_median_mad_2d(_as_2d(data), windows)
+    return {
+        w: (_wrap(median, data), _wrap(mad, data))
+        for w, (median, mad) in results.items()
+    }
@@ -0,0 +1,176 @@
+"""
+CRR 二叉树期权定价（美式 / 欧式），合约维度批量计算
+"""
+
+from typing import Dict
+
+import numpy as np
+
+
+DEFAULT_STEPS = 500
+VEGA_BUMP = 0.01
+RHO_BUMP = 0.0001
+
+
+class CRRBinomialOption:
+    """CRR 二叉树定价：每个时间步对所有合约、所有节点做一次数组运算"""
+
+    @staticmethod
+    def price_batch(
+        S,
+        K,
+        T,
+        r,
+        sigma,
+        option_type="call",
+        steps: int = DEFAULT_STEPS,
+        american: bool = True,
+        q: float = 0.0,
+        return_boundary: bool = False,
+    ) -> Dict[str, np.ndarray]:
+        """
+        批量计算二叉树期权价格
+
+        参数:
+            S, K, T, r, sigma: 标量或一维数组（合约维度，按广播对齐）
+            option_type: 'call' / 'put' 或同形状字符串数组
+            steps: 树的步数
+            american: 是否允许提前行权
+            q: 连续股息率
+            return_boundary: 是否返回提前行权边界
+
+        返回:
+            Dict: price / delta / gamma / theta（树上直接读出，theta 按日）；
+            return_boundary=True 时另含 boundary（合约 × 步，
+            put 为行权区最高节点价，call 为最低节点价，无行权为 NaN）和 boundary_t
+            （T<=0 或 sigma<=0 的合约：价格取内在价值，Greeks 为 0）
+        """
+        if steps < 3:
+            raise ValueError("steps 至少为 3")
+        S, K, T, r, sigma, q, is_call = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(S, dtype=float)),
+            np.atleast_1d(np.asarray(K, dtype=float)),
+            np.atleast_1d(np.asarray(T, dtype=float)),
+            np.atleast_1d(np.asarray(r, dtype=float)),
+            np.atleast_1d(np.asarray(sigma, dtype=float)),
+            np.atleast_1d(np.asarray(q, dtype=float)),
+            np.atleast_1d(np.asarray(option_type) == "call"),
+        )
+        sign = np.where(is_call, 1.0, -1.0)
+        valid = (T > 0) & (sigma > 0)
+        T_safe = np.where(valid, T, 1.0)
+        sigma_safe = np.where(valid, sigma, 1.0)
+
+        dt = T_safe / steps
+        u = np.exp(sigma_safe * np.sqrt(dt))
+        d = 1.0 / u
+        p = (np.exp((r - q) * dt) - d) / (u - d)
+        disc = np.exp(-r * dt)
+        disc_up = disc * p
+        disc_down = disc * (1 - p)
+        strike_signed = sign * K
+
+        # 节点在前、合约在后（每步切片为连续内存）
+        # 节点价网格 S * u^(k - N), k=0..2N；第 i 步节点为步长 2 的切片视图
+        grid = S * u ** (np.arange(2 * steps + 1) - steps)[:, None]
+        grid *= sign
+        values = np.maximum(grid[::2] - strike_signed, 0.0)
+        buffer = np.empty_like(values)
+
+        boundary = np.full((steps, S.size), np.nan) if return_boundary else None
+        snapshots = {}
+        for i in range(steps - 1, -1, -1):
+            width = i + 1
+            cont = values[:width]
+            up = buffer[:width]
+            np.multiply(values[1 : width + 1], disc_up, out=up)
+            cont *= disc_down
+            cont += up
+            if american:
+                nodes = grid[steps - i : steps + i + 1 : 2]
+                exercise = np.subtract(nodes, strike_signed, out=up)
+                if return_boundary:
+                    early = exercise > cont
+                    boundary[i] = _exercise_boundary(sign * nodes, early, is_call)
+                np.maximum(cont, exercise, out=cont)
+            if i <= 2:
+                snapshots[i] = cont.copy()
+
+        price = snapshots[0][0]
+        v1, v2 = snapshots[1], snapshots[2]
+        delta = (v1[1] - v1[0]) / (S * u - S * d)
+        gamma_up = (v2[2] - v2[1]) / (S * u * u - S)
+        gamma_down = (v2[1] - v2[0]) / (S - S * d * d)
+        gamma = (gamma_up - gamma_down) / (0.5 * (S * u * u - S * d * d))
+        theta = (v2[1] - price) / (2 * dt) / 365
+
+        intrinsic = np.maximum(sign * (S - K), 0.0)
+        result = {
+            "price": np.where(valid, price, intrinsic),
+            "delta": np.where(valid, delta, 0.0),
+            "gamma": np.where(valid, gamma, 0.0),
+            "theta": np.where(valid, theta, 0.0),
+        }
+        if return_boundary:
+            result["boundary"] = np.where(valid[:, None], boundary.T, np.nan)
+            result["boundary_t"] = dt[:, None] * np.arange(steps)
+        return result
+
+    @staticmethod
+    def greeks_batch(
+        S,
+        K,
+        T,
+        r,
+        sigma,
+        option_type="call",
+        steps: int = DEFAULT_STEPS,
+        american: bool = True,
+        q: float = 0.0,
+    ) -> Dict[str, np.ndarray]:
+        """
+        批量计算二叉树价格与 Greeks
+
+        delta / gamma / theta 取自树上节点，vega / rho 为中心差分
+        （口径与 BlackScholesOption.greeks 一致：vega、rho 按 1%，theta 按日）
+        """
+        base = CRRBinomialOption.price_batch(
+            S, K, T, r, sigma, option_type, steps=steps, american=american, q=q
+        )
+        sigma = np.asarray(sigma, dtype=float)
+        r = np.asarray(r, dtype=float)
+        bumped = {}
+        for name, kwargs in {
+            "vega_up": {"sigma": sigma + VEGA_BUMP, "r": r},
+            "vega_down": {"sigma": np.maximum(sigma - VEGA_BUMP, 1e-6), "r": r},
+            "rho_up": {"sigma": sigma, "r": r + RHO_BUMP},
+            "rho_down": {"sigma": sigma, "r": r - RHO_BUMP},
+        }.items():
+            bumped[name] = CRRBinomialOption.price_batch(
+                S,
+                K,
+                T,
+                option_type=option_type,
+                steps=steps,
+                american=american,
+                q=q,
+                **kwargs,
+            )["price"]
+
+        sigma_width = (sigma + VEGA_BUMP) - np.maximum(sigma - VEGA_BUMP, 1e-6)
+        valid = (np.asarray(T, dtype=float) > 0) & (sigma > 0)
+        vega = (bumped["vega_up"] - bumped["vega_down"]) / sigma_width / 100
+        rho = (bumped["rho_up"] - bumped["rho_down"]) / (2 * RHO_BUMP) / 100
+        base["vega"] = np.where(valid, vega, 0.0)
+        base["rho"] = np.where(valid, rho, 0.0)
+        return base
+
+
+def _exercise_boundary(
+    spot_nodes: np.ndarray, early: np.ndarray, is_call: np.ndarray
+) -> np.ndarray:
+    """单步提前行权边界：put 取行权节点的最高价，call 取最低价"""
+    put_edge = np.where(early, spot_nodes, -np.inf).max(axis=0)
+    call_edge = np.where(early, spot_nodes, np.inf).min(axis=0)
+    edge = np.where(is_call, call_edge, put_edge)
+    return np.where(np.isfinite(edge), edge, np.nan)
@@ -73,3 +73,76 @@ class BlackScholesOption:
             "theta": theta,
             "rho": rho,
         }
+
+    @staticmethod
+    def batch_price_greeks(
+        S,
+        K,
+        T,
+        r,
+        sigma,
+        option_type="call",
+        include_greeks: bool = True,
+    ) -> Dict[str, np.ndarray]:
+        """
+        批量计算期权价格与 Greeks（支持 NumPy 广播）
+
+        参数:
+            S, K, T, r, sigma: 标量或数组，按 NumPy 规则广播
+            option_type: 'call' / 'put'，或同形状的字符串数组
+            include_greeks: 是否同时输出 Greeks
+
+        返回:
+            Dict: price / delta / gamma / vega / theta / rho 数组
+            （T<=0 或 sigma<=0 的元素：价格取内在价值，Greeks 为 0，与标量函数一致）
+        """
+        S, K, T, r, sigma, is_call = np.broadcast_arrays(
+            np.asarray(S, dtype=float),
+            np.asarray(K, dtype=float),
+            np.asarray(T, dtype=float),
+            np.asarray(r, dtype=float),
+            np.asarray(sigma, dtype=float),
+            np.asarray(option_type) == "call",
+        )
+        valid = (T > 0) & (sigma > 0)
+        # 无效元素代入安全值，结果在最后用掩码覆盖
+        T_safe = np.where(valid, T, 1.0)
+        sigma_safe = np.where(valid, sigma, 1.0)
+
+        sqrt_t = np.sqrt(T_safe)
+        sig_sqrt_t = sigma_safe * sqrt_t
+        d1 = (np.log(S / K) + (r + 0.5 * sigma_safe**2) * T_safe) / sig_sqrt_t
+        d2 = d1 - sig_sqrt_t
+        disc_k = K * np.exp(-r * T_safe)
+        cdf_d1 = norm.cdf(d1)
+        cdf_d2 = norm.cdf(d2)
+
+        call = S * cdf_d1 - disc_k * cdf_d2
+        put = disc_k * norm.cdf(-d2) - S * norm.cdf(-d1)
+        intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+        price = np.where(valid, np.where(is_call, call, put), intrinsic)
+        result = {"price": price}
+        if not include_greeks:
+            return result
+
+        pdf_d1 = norm.pdf(d1)
+        decay = -S * pdf_d1 * sigma_safe / (2 * sqrt_t)
+        delta = np.where(is_call, cdf_d1, cdf_d1 - 1)
+        theta = np.where(
+            is_call,
+            decay - r * disc_k * cdf_d2,
+            decay + r * disc_k * norm.cdf(-d2),
+        )
+        rho = np.where(
+            is_call, T_safe * disc_k * cdf_d2, -T_safe * disc_k * norm.cdf(-d2)
+        )
+        greeks = {
+            "delta": delta,
+            "gamma": pdf_d1 / (S * sig_sqrt_t),
+            "vega": S * pdf_d1 * sqrt_t / 100,
+            "theta": theta / 365,
+            "rho": rho / 100,
+        }
+        for name, values in greeks.items():
+            result[name] = np.where(valid, values, 0.0)
+        return result
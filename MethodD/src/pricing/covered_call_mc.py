@@ -0,0 +1,198 @@
+"""
+覆盖式卖 call 的 Monte Carlo PnL 分布（t0 → t5 持有期）
+
+- 正股与 IV 联合路径：正股按 GBM（扩散波动率取当期 IV），log-IV 按均值回复的 OU
+  过程，两者的冲击相关
+- 路径维度全向量化，按 chunk 分块模拟：路径状态与均值 / 标准误 / 控制变量系数用的
+  累计矩只随 chunk_size 增长；分位数、VaR 与 ES 需要全部路径的终值 PnL，
+  因此另保留一个 n_paths 长的 float64 数组
+- 时间统一按 ACT/365 折年（与 T、year_fraction_to_expiry 一致）：持有期换算成
+  自然日后再均分到每个交易日步长
+- 支持对偶变量（antithetic）与以正股终值为控制变量的均值修正
+- 平仓时用 BlackScholesOption.batch_price_greeks 批量估值 call
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from src.pricing.bs_pricer import BlackScholesOption
+
+
+CALENDAR_DAYS_PER_YEAR = 365
+# 缺省的交易日 -> 自然日换算（每周 5 个交易日对应 7 个自然日）
+CALENDAR_DAYS_PER_TRADING_DAY = 7 / 5
+
+
+@dataclass
+class MonteCarloConfig:
+    """
+    Monte Carlo 参数（波动率类参数均为年化，ACT/365）
+
+    horizon_days 为模拟步数（交易日）；horizon_calendar_days 为持有期的自然日数，
+    缺省按 horizon_days × 7 / 5 折算
+    """
+
+    n_paths: int = 100_000
+    horizon_days: int = 5
+    horizon_calendar_days: Optional[float] = None
+    chunk_size: int = 50_000
+    drift: float = 0.0
+    vol_of_iv: float = 1.0
+    iv_mean_reversion: float = 5.0
+    iv_long_run: Optional[float] = None
+    spot_iv_corr: float = -0.7
+    antithetic: bool = True
+    control_variate: bool = True
+    quantiles: Sequence[float] = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+    es_level: float = 0.95
+    seed: Optional[int] = None
+
+
+def _simulate_chunk(
+    rng: np.random.Generator,
+    n: int,
+    entry_spot: float,
+    iv_entry: float,
+    config: MonteCarloConfig,
+) -> Dict[str, np.ndarray]:
+    """模拟一个 chunk 的终值 (spot, iv)，按交易日步进"""
+    dt = _horizon_years(config) / config.horizon_days
+    sqrt_dt = np.sqrt(dt)
+    rho = config.spot_iv_corr
+    long_run = np.log(config.iv_long_run or iv_entry)
+
+    half = n // 2 if config.antithetic else n
+    log_spot = np.full(n, np.log(entry_spot))
+    log_iv = np.full(n, np.log(iv_entry))
+    for _ in range(config.horizon_days):
+        z = rng.standard_normal((2, half))
+        if config.antithetic:
+            z = np.concatenate([z, -z], axis=1)
+        sigma = np.exp(log_iv)
+        log_spot += (config.drift - 0.5 * sigma**2) * dt + sigma * sqrt_dt * z[0]
+        shock = rho * z[0] + np.sqrt(1 - rho**2) * z[1]
+        log_iv += (
+            config.iv_mean_reversion * (long_run - log_iv) * dt
+            + config.vol_of_iv * sqrt_dt * shock
+        )
+    return {"spot": np.exp(log_spot), "iv": np.exp(log_iv)}
+
+
+def _horizon_years(config: MonteCarloConfig) -> float:
+    """持有期折年（ACT/365）"""
+    calendar_days = config.horizon_calendar_days
+    if calendar_days is None:
+        calendar_days = config.horizon_days * CALENDAR_DAYS_PER_TRADING_DAY
+    return calendar_days / CALENDAR_DAYS_PER_YEAR
+
+
+def simulate_covered_call_pnl(
+    entry_spot: float,
+    strike: float,
+    call_premium_received: float,
+    T: float,
+    iv_entry: float,
+    r: float = 0.02,
+    shares: int = 100,
+    config: Optional[MonteCarloConfig] = None,
+    return_paths: bool = False,
+) -> Dict[str, object]:
+    """
+    模拟覆盖式卖 call 持有 horizon_days 个交易日后的 PnL 分布
+
+    参数:
+        entry_spot: 正股买入价
+        strike: call 行权价
+        call_premium_received: 卖出 call 收到的每股权利金
+        T: 建仓时 call 剩余年数（ACT/365，如 year_fraction_to_expiry）
+        iv_entry: 建仓时 IV（路径初值）
+        r: 无风险利率
+        shares: 股数
+        config: MonteCarloConfig（默认参数见类定义）
+        return_paths: 是否返回全部路径的终值 PnL
+
+    返回:
+        Dict: mean_pnl / mean_pnl_cv / std_pnl / std_error / std_error_cv /
+        quantiles / var / expected_shortfall / prob_capped / prob_loss / n_paths
+    """
+    config = config or MonteCarloConfig()
+    if config.n_paths <= 0 or config.chunk_size <= 0:
+        raise ValueError("n_paths 与 chunk_size 必须为正")
+    if config.horizon_days <= 0 or _horizon_years(config) <= 0:
+        raise ValueError("horizon_days 与 horizon_calendar_days 必须为正")
+    if config.antithetic and (config.n_paths % 2 or config.chunk_size % 2):
+        raise ValueError("对偶变量要求 n_paths 与 chunk_size 为偶数")
+
+    rng = np.random.default_rng(config.seed)
+    horizon = _horizon_years(config)
+    # 控制变量：正股终值，理论期望 S0 * exp(drift * h)
+    control_mean = entry_spot * np.exp(config.drift * horizon)
+
+    pnl = np.empty(config.n_paths)
+    capped = 0
+    # 估计均值用的独立样本（对偶时为配对均值）的累计矩
+    n_samples = 0
+    sum_y = sum_x = sum_yy = sum_xx = sum_xy = 0.0
+
+    for start in range(0, config.n_paths, config.chunk_size):
+        n = min(config.chunk_size, config.n_paths - start)
+        terminal = _simulate_chunk(rng, n, entry_spot, iv_entry, config)
+        call_exit = BlackScholesOption.batch_price_greeks(
+            terminal["spot"],
+            strike,
+            T - horizon,
+            r,
+            terminal["iv"],
+            "call",
+            include_greeks=False,
+        )["price"]
+        chunk_pnl = (terminal["spot"] - entry_spot) * shares + (
+            call_premium_received - call_exit
+        ) * shares
+        pnl[start : start + n] = chunk_pnl
+        capped += int(np.count_nonzero(terminal["spot"] > strike))
+
+        y, x = chunk_pnl, terminal["spot"]
+        if config.antithetic:
+            y = 0.5 * (y[: n // 2] + y[n // 2 :])
+            x = 0.5 * (x[: n // 2] + x[n // 2 :])
+        n_samples += y.size
+        sum_y += y.sum()
+        sum_x += x.sum()
+        sum_yy += np.dot(y, y)
+        sum_xx += np.dot(x, x)
+        sum_xy += np.dot(x, y)
+
+    mean_y = sum_y / n_samples
+    mean_x = sum_x / n_samples
+    var_y = max(sum_yy / n_samples - mean_y**2, 0.0)
+    var_x = max(sum_xx / n_samples - mean_x**2, 0.0)
+    cov_xy = sum_xy / n_samples - mean_x * mean_y
+
+    mean_cv, var_cv = mean_y, var_y
+    if config.control_variate and var_x > 0:
+        beta = cov_xy / var_x
+        mean_cv = mean_y - beta * (mean_x - control_mean)
+        var_cv = max(var_y - cov_xy**2 / var_x, 0.0)
+
+    levels = np.asarray(config.quantiles, dtype=float)
+    tail_level = 1 - config.es_level
+    var_threshold = np.quantile(pnl, tail_level)
+    result = {
+        "mean_pnl": float(pnl.mean()),
+        "mean_pnl_cv": float(mean_cv),
+        "std_pnl": float(pnl.std()),
+        "std_error": float(np.sqrt(var_y / n_samples)),
+        "std_error_cv": float(np.sqrt(var_cv / n_samples)),
+        "quantiles": dict(zip(levels.tolist(), np.quantile(pnl, levels).tolist())),
+        "var": float(-var_threshold),
+        "expected_shortfall": float(-pnl[pnl <= var_threshold].mean()),
+        "prob_capped": capped / config.n_paths,
+        "prob_loss": float(np.mean(pnl < 0)),
+        "n_paths": config.n_paths,
+    }
+    if return_paths:
+        result["pnl"] = pnl
+    return result
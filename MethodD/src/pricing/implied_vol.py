@@ -0,0 +1,260 @@
+"""
+隐含波动率批量求解：Newton + 二分兜底（逐元素收敛掩码）
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.pricing.bs_pricer import BlackScholesOption
+
+
+IV_LOWER = 1e-4
+IV_UPPER = 10.0
+PRICE_TOL = 1e-8
+MAX_ITER = 100
+# 可识别性：价格误差 tol 对应的 IV 误差（tol / vega）须不超过该值
+IV_RESOLUTION = 1e-4
+# 美股期权到期日按美东 16:00（EST 即 UTC 21:00）收盘计算剩余期限
+EXPIRY_CLOSE_UTC_HOUR = 21
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+
+STATUS_OK = "ok"
+STATUS_INVALID_INPUT = "invalid_input"
+STATUS_EXPIRED = "expired"
+STATUS_BELOW_MIN_VOL = "below_min_vol"
+STATUS_ABOVE_MAX_VOL = "above_max_vol"
+STATUS_NO_CONVERGENCE = "no_convergence"
+STATUS_UNIDENTIFIED = "unidentified"
+
+
+def _bs_price_vega(S, K, T, r, sigma, is_call) -> Dict[str, np.ndarray]:
+    result = BlackScholesOption.batch_price_greeks(
+        S, K, T, r, sigma, np.where(is_call, "call", "put")
+    )
+    # batch_price_greeks 的 vega 为每 1% 波动率，这里还原为每 1.0
+    return {"price": result["price"], "vega": result["vega"] * 100}
+
+
+def implied_vol_batch(
+    price,
+    S,
+    K,
+    T,
+    r,
+    option_type="call",
+    tol: float = PRICE_TOL,
+    max_iter: int = MAX_ITER,
+    lower: float = IV_LOWER,
+    upper: float = IV_UPPER,
+) -> Dict[str, np.ndarray]:
+    """
+    批量反解隐含波动率
+
+    每轮迭代对所有未收敛合约同时做一次 Newton 步；若 Newton 步越出当前
+    [lo, hi] 区间或 vega 过小，则该元素退化为二分。
+
+    停止时价格残差超过 tol（区间已收缩到头），或 vega 小到价格误差 tol 对应的
+    IV 误差超过 IV_RESOLUTION（深度实值 / 虚值、临近到期）时，价格无法确定 IV：
+    状态记为 unidentified，iv 为 NaN，converged 为 False
+
+    参数:
+        price: 期权价格（如 mid_else_last 口径）
+        S, K, T, r: 现价、行权价、剩余期限（年）、无风险利率
+        option_type: 'call' / 'put' 或同形状字符串数组
+        tol: 价格收敛容差
+        max_iter: 最大迭代次数
+        lower, upper: 波动率搜索区间
+
+    返回:
+        Dict: iv / converged / iterations / status 数组（status 取 ok / invalid_input /
+        expired / below_min_vol / above_max_vol / unidentified / no_convergence）
+    """
+    price, S, K, T, r, option_type = np.broadcast_arrays(
+        np.asarray(price, dtype=float),
+        np.asarray(S, dtype=float),
+        np.asarray(K, dtype=float),
+        np.asarray(T, dtype=float),
+        np.asarray(r, dtype=float),
+        np.asarray(option_type),
+    )
+    shape = price.shape
+    price, S, K, T, r = (arr.ravel() for arr in (price, S, K, T, r))
+    is_call = option_type.ravel() == "call"
+    n = price.size
+
+    iv = np.full(n, np.nan)
+    converged = np.zeros(n, dtype=bool)
+    iterations = np.zeros(n, dtype=np.int32)
+    status = np.full(n, STATUS_NO_CONVERGENCE, dtype=object)
+
+    invalid = ~(
+        np.isfinite(price)
+        & np.isfinite(S)
+        & np.isfinite(K)
+        & np.isfinite(r)
+        & (price > 0)
+        & (S > 0)
+        & (K > 0)
+    )
+    expired = ~invalid & ~(T > 0)
+    status[invalid] = STATUS_INVALID_INPUT
+    status[expired] = STATUS_EXPIRED
+
+    # 价格关于 sigma 单调递增：先检查目标价是否落在 [lower, upper] 对应的价格区间内
+    candidate = np.flatnonzero(~invalid & ~expired)
+    S_c, K_c, T_c, r_c = S[candidate], K[candidate], T[candidate], r[candidate]
+    bounds_lo = _bs_price_vega(S_c, K_c, T_c, r_c, lower, is_call[candidate])
+    bounds_hi = _bs_price_vega(S_c, K_c, T_c, r_c, upper, is_call[candidate])
+    target = price[candidate]
+    below = target < bounds_lo["price"] - tol
+    above = target > bounds_hi["price"] + tol
+    status[candidate[below]] = STATUS_BELOW_MIN_VOL
+    status[candidate[above]] = STATUS_ABOVE_MAX_VOL
+
+    idx = candidate[~below & ~above]
+    lo = np.full(idx.size, lower)
+    hi = np.full(idx.size, upper)
+    # Brenner-Subrahmanyam 近似作为初值
+    sigma = np.sqrt(2 * np.pi / T[idx]) * price[idx] / S[idx]
+    sigma = np.clip(np.nan_to_num(sigma, nan=0.5), lower, upper)
+
+    for step in range(1, max_iter + 1):
+        if idx.size == 0:
+            break
+        model = _bs_price_vega(S[idx], K[idx], T[idx], r[idx], sigma, is_call[idx])
+        diff = model["price"] - price[idx]
+        iterations[idx] = step
+
+        done = (np.abs(diff) < tol) | (hi - lo < 1e-12)
+        identified = (np.abs(diff) < tol) & (model["vega"] * IV_RESOLUTION >= tol)
+        solved = done & identified
+        iv[idx[solved]] = sigma[solved]
+        converged[idx[solved]] = True
+        status[idx[solved]] = STATUS_OK
+        status[idx[done & ~identified]] = STATUS_UNIDENTIFIED
+
+        keep = ~done
+        idx, sigma, lo, hi = idx[keep], sigma[keep], lo[keep], hi[keep]
+        diff = diff[keep]
+        vega = model["vega"][keep]
+        hi = np.where(diff > 0, sigma, hi)
+        lo = np.where(diff > 0, lo, sigma)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = sigma - diff / vega
+        use_newton = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        sigma = np.where(use_newton, newton, 0.5 * (lo + hi))
+
+    return {
+        "iv": iv.reshape(shape),
+        "converged": converged.reshape(shape),
+        "iterations": iterations.reshape(shape),
+        "status": status.reshape(shape),
+    }
+
+
+def mid_else_last_price(chain_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    按 mid_else_last 口径批量取价
+
+    返回:
+        DataFrame: price_used / price_source（mid / last / missing）
+    """
+    bid = pd.to_numeric(chain_df["bid"], errors="coerce").to_numpy(dtype=float)
+    ask = pd.to_numeric(chain_df["ask"], errors="coerce").to_numpy(dtype=float)
+    last = pd.to_numeric(chain_df["last"], errors="coerce").to_numpy(dtype=float)
+
+    has_mid = (bid > 0) & (ask > 0)
+    has_last = ~has_mid & (last > 0)
+    price_used = np.where(has_mid, (bid + ask) / 2, np.where(has_last, last, np.nan))
+    price_source = np.where(has_mid, "mid", np.where(has_last, "last", "missing"))
+    return pd.DataFrame(
+        {"price_used": price_used, "price_source": price_source},
+        index=chain_df.index,
+    )
+
+
+def year_fraction_to_expiry(expiry, as_of) -> np.ndarray:
+    """
+    计算到期剩余年数（按自然日 / 365）
+
+    参数:
+        expiry: 到期日（'YYYY-MM-DD' 字符串、序列或数组）
+        as_of: 估值时间（快照时间戳，带时区时按 UTC 处理）
+    """
+    as_of_ts = pd.Timestamp(as_of)
+    if as_of_ts.tzinfo is not None:
+        as_of_ts = as_of_ts.tz_convert("UTC").tz_localize(None)
+    expiry_ts = pd.to_datetime(pd.Series(np.atleast_1d(expiry)).astype(str))
+    expiry_close = expiry_ts + pd.Timedelta(hours=EXPIRY_CLOSE_UTC_HOUR)
+    seconds = (expiry_close - as_of_ts).dt.total_seconds().to_numpy()
+    return seconds / SECONDS_PER_YEAR
+
+
+def solve_chain_iv(
+    chain_df: pd.DataFrame,
+    spot: float,
+    as_of,
+    r: float = 0.02,
+    tol: float = PRICE_TOL,
+    max_iter: int = MAX_ITER,
+) -> pd.DataFrame:
+    """
+    对整条快照期权链按 mid_else_last 价格重新反解 IV
+
+    参数:
+        chain_df: 快照期权链（expiry / strike / bid / ask / last / optionType）
+        spot: 快照现价
+        as_of: 快照时间戳（meta.captured_at_utc 或 timestamp）
+        r: 无风险利率
+
+    返回:
+        DataFrame: 原链 + price_used / price_source / T / iv_solved /
+        iv_converged / iv_status / iv_iterations
+    """
+    result = chain_df.copy()
+    if result.empty:
+        for col in [
+            "price_used",
+            "price_source",
+            "T",
+            "iv_solved",
+            "iv_converged",
+            "iv_status",
+            "iv_iterations",
+        ]:
+            result[col] = pd.Series(dtype=object)
+        return result
+
+    prices = mid_else_last_price(result)
+    result["price_used"] = prices["price_used"]
+    result["price_source"] = prices["price_source"]
+    result["T"] = year_fraction_to_expiry(result["expiry"], as_of)
+
+    solved = implied_vol_batch(
+        price=result["price_used"].to_numpy(),
+        S=float(spot),
+        K=pd.to_numeric(result["strike"], errors="coerce").to_numpy(dtype=float),
+        T=result["T"].to_numpy(),
+        r=r,
+        option_type=result["optionType"].astype(str).to_numpy(),
+        tol=tol,
+        max_iter=max_iter,
+    )
+    result["iv_solved"] = solved["iv"]
+    result["iv_converged"] = solved["converged"]
+    result["iv_status"] = solved["status"]
+    result["iv_iterations"] = solved["iterations"]
+    return result
+
+
+def solve_snapshot_iv(
+    snapshot: Dict[str, object], r: float = 0.02, as_of: Optional[object] = None
+) -> pd.DataFrame:
+    """对 load_snapshot 读出的快照整链反解 IV（默认用快照时间戳估值）"""
+    as_of = as_of or snapshot.get("timestamp")
+    if not as_of:
+        raise ValueError("快照缺少 timestamp，无法计算剩余期限")
+    return solve_chain_iv(snapshot["chain"], snapshot["spot"], as_of, r=r)
@@ -0,0 +1,148 @@
+"""
+情景引擎：正股 + 期权组合在 spot × IV × 持有天数 网格上的批量重估
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from src.pricing.bs_pricer import BlackScholesOption
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+@dataclass
+class OptionLeg:
+    """期权腿（quantity 按股数计，负数为卖出，如 -100 = 卖出 1 张）"""
+
+    option_type: str
+    strike: float
+    T: float
+    quantity: float
+    entry_premium: float
+
+
+def revalue_position_grid(
+    entry_spot: float,
+    shares: float,
+    legs: List[OptionLeg],
+    spot_grid: Sequence[float],
+    iv_grid: Sequence[float],
+    days_grid: Sequence[float],
+    r: float = 0.02,
+) -> Dict[str, np.ndarray]:
+    """
+    在 spot × IV × 已持有交易日 网格上一次性重估组合 PnL
+
+    参数:
+        entry_spot: 建仓时正股价格
+        shares: 正股股数（负数为做空）
+        legs: 期权腿列表（T 为建仓时剩余年数）
+        spot_grid: 情景现价（升序）
+        iv_grid: 情景隐含波动率
+        days_grid: 已持有交易日数
+        r: 无风险利率
+
+    返回:
+        Dict: pnl / stock_pnl / option_pnl 立方体（spot, iv, days），
+        breakeven（iv, days）盈亏平衡现价，cap（iv, days）网格内最大 PnL，
+        以及 spot / iv / days 坐标轴
+    """
+    spot = np.asarray(spot_grid, dtype=float)
+    iv = np.asarray(iv_grid, dtype=float)
+    days = np.asarray(days_grid, dtype=float)
+    shape = (spot.size, iv.size, days.size)
+
+    S = spot[:, None, None]
+    sigma = iv[None, :, None]
+    elapsed = days[None, None, :] / TRADING_DAYS_PER_YEAR
+
+    stock_pnl = np.broadcast_to((S - entry_spot) * shares, shape)
+    option_pnl = np.zeros(shape)
+    for leg in legs:
+        value = BlackScholesOption.batch_price_greeks(
+            S,
+            leg.strike,
+            leg.T - elapsed,
+            r,
+            sigma,
+            leg.option_type,
+            include_greeks=False,
+        )["price"]
+        option_pnl += (value - leg.entry_premium) * leg.quantity
+
+    pnl = stock_pnl + option_pnl
+    return {
+        "spot": spot,
+        "iv": iv,
+        "days": days,
+        "pnl": pnl,
+        "stock_pnl": np.array(stock_pnl),
+        "option_pnl": option_pnl,
+        "breakeven": _breakeven_surface(spot, pnl),
+        "cap": pnl.max(axis=0),
+    }
+
+
+def _breakeven_surface(spot: np.ndarray, pnl: np.ndarray) -> np.ndarray:
+    """
+    沿 spot 轴找第一个盈亏变号的点（由负转非负或由非负转负），线性插值出
+    盈亏平衡现价（无交点为 NaN）
+    """
+    if spot.size < 2:
+        return np.full(pnl.shape[1:], np.nan)
+    positive = pnl >= 0
+    crossing = positive[1:] != positive[:-1]
+    has_cross = crossing.any(axis=0)
+    first = crossing.argmax(axis=0)
+
+    p0 = np.take_along_axis(pnl, first[None], axis=0)[0]
+    p1 = np.take_along_axis(pnl, first[None] + 1, axis=0)[0]
+    s0 = spot[first]
+    s1 = spot[first + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        breakeven = s0 - p0 * (s1 - s0) / (p1 - p0)
+    return np.where(has_cross, breakeven, np.nan)
+
+
+def covered_call_grid(
+    entry_spot: float,
+    strike: float,
+    call_premium_received: float,
+    T: float,
+    iv_grid: Sequence[float],
+    days_grid: Sequence[float],
+    spot_range: Sequence[float] = (0.8, 1.2),
+    n_spot: int = 200,
+    shares: int = 100,
+    r: float = 0.02,
+) -> Dict[str, np.ndarray]:
+    """
+    覆盖式卖 call 的情景网格（买入正股 + 卖出等量 call）
+
+    参数:
+        entry_spot: 正股买入价
+        strike: call 行权价
+        call_premium_received: 卖出 call 收到的每股权利金
+        T: 建仓时 call 剩余年数
+        iv_grid: 情景 IV
+        days_grid: 已持有交易日数
+        spot_range: 现价网格相对 entry_spot 的上下限
+        n_spot: 现价网格点数
+        shares: 股数
+    """
+    spot_grid = np.linspace(
+        entry_spot * spot_range[0], entry_spot * spot_range[1], n_spot
+    )
+    leg = OptionLeg(
+        option_type="call",
+        strike=strike,
+        T=T,
+        quantity=-shares,
+        entry_premium=call_premium_received,
+    )
+    return revalue_position_grid(
+        entry_spot, shares, [leg], spot_grid, iv_grid, days_grid, r=r
+    )
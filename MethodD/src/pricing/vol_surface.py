@@ -0,0 +1,229 @@
+"""
+隐含波动率曲面：每个快照构建一次，按 sha256 缓存到快照旁
+
+- 每个到期日在 log-moneyness 上做保形单调样条（PCHIP）拟合总方差
+- 到期之间按总方差对 T 线性插值
+- 拟合结果落在均匀 k 网格上，任意 (K, T) 查询为 O(1) 的网格插值
+"""
+
+import hashlib
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import PchipInterpolator
+
+from src.data.real_data_loader import load_snapshot
+from src.data.snapshot_store import load_checksum
+from src.pricing.implied_vol import solve_chain_iv, year_fraction_to_expiry
+
+
+GRID_POINTS = 201
+MIN_IV = 0.01
+MAX_IV = 5.0
+CACHE_VERSION = 1
+
+
+class VolSurface:
+    """总方差网格 w(k, T)，k = log(K / F)"""
+
+    def __init__(
+        self,
+        k_grid: np.ndarray,
+        expiry_T: np.ndarray,
+        total_variance: np.ndarray,
+        spot: float,
+        r: float,
+    ):
+        self.k_grid = np.asarray(k_grid, dtype=float)
+        self.expiry_T = np.asarray(expiry_T, dtype=float)
+        self.total_variance = np.asarray(total_variance, dtype=float)
+        self.spot = float(spot)
+        self.r = float(r)
+        self._k0 = self.k_grid[0]
+        self._dk = self.k_grid[1] - self.k_grid[0]
+
+    @classmethod
+    def from_chain(
+        cls,
+        chain_df: pd.DataFrame,
+        spot: float,
+        as_of,
+        r: float = 0.02,
+        iv_col: str = "iv",
+        grid_points: int = GRID_POINTS,
+    ) -> "VolSurface":
+        """
+        从期权链拟合曲面（每个到期日只用 OTM 合约：K>=F 取 call，K<F 取 put）
+
+        参数:
+            chain_df: 期权链（expiry / strike / optionType / iv_col）
+            spot: 现价
+            as_of: 快照时间戳
+            r: 无风险利率
+            iv_col: IV 列（如 'iv' 或 solve_chain_iv 输出的 'iv_solved'）
+        """
+        chain = chain_df.copy()
+        chain["T"] = year_fraction_to_expiry(chain["expiry"], as_of)
+        chain["strike"] = pd.to_numeric(chain["strike"], errors="coerce")
+        chain["iv_fit"] = pd.to_numeric(chain[iv_col], errors="coerce")
+        chain = chain[
+            (chain["T"] > 0)
+            & (chain["strike"] > 0)
+            & chain["iv_fit"].between(MIN_IV, MAX_IV)
+        ].copy()
+        forward = spot * np.exp(r * chain["T"])
+        chain["k"] = np.log(chain["strike"] / forward)
+        is_call = chain["optionType"].astype(str) == "call"
+        chain = chain[
+            (is_call & (chain["k"] >= 0)) | (~is_call & (chain["k"] < 0))
+        ].copy()
+        chain["w"] = chain["iv_fit"] ** 2 * chain["T"]
+        if chain.empty:
+            raise ValueError("期权链中没有可用于拟合曲面的合约")
+
+        k_grid = np.linspace(chain["k"].min(), chain["k"].max(), grid_points)
+        expiry_T = []
+        rows = []
+        for T, smile in chain.groupby("T", sort=True):
+            smile = smile.groupby("k", sort=True)["w"].mean()
+            k = smile.index.to_numpy()
+            w = smile.to_numpy()
+            if k.size == 1:
+                fitted = np.full(grid_points, w[0])
+            else:
+                # 区间外按端点水平外推
+                fitted = PchipInterpolator(k, w)(np.clip(k_grid, k[0], k[-1]))
+            expiry_T.append(T)
+            rows.append(fitted)
+        return cls(k_grid, np.array(expiry_T), np.vstack(rows), spot, r)
+
+    def total_variance_at(self, K, T) -> np.ndarray:
+        """查询总方差 w(K, T)（数组广播；K、T 非有限或 K <= 0 的元素为 NaN）"""
+        K, T = np.broadcast_arrays(
+            np.asarray(K, dtype=float), np.asarray(T, dtype=float)
+        )
+        # 无效元素先换成网格内的占位值定位，最后再置 NaN
+        valid = np.isfinite(K) & np.isfinite(T) & (K > 0)
+        K = np.where(valid, K, self.spot)
+        T = np.where(valid, T, self.expiry_T[0])
+        k = np.log(K / (self.spot * np.exp(self.r * T)))
+
+        # k 方向：均匀网格直接定位
+        pos = np.clip((k - self._k0) / self._dk, 0, self.k_grid.size - 1)
+        left = np.minimum(pos.astype(int), self.k_grid.size - 2)
+        frac = pos - left
+        w_k = (
+            self.total_variance[:, left] * (1 - frac)
+            + self.total_variance[:, left + 1] * frac
+        )
+
+        # T 方向：总方差线性插值，两端按常数波动率外推
+        nodes = self.expiry_T
+        if nodes.size == 1:
+            return np.where(valid, w_k[0] * T / nodes[0], np.nan)
+        j = np.clip(np.searchsorted(nodes, T) - 1, 0, nodes.size - 2)
+        t0, t1 = nodes[j], nodes[j + 1]
+        w0 = np.take_along_axis(w_k, j[None], axis=0)[0]
+        w1 = np.take_along_axis(w_k, j[None] + 1, axis=0)[0]
+        weight = (T - t0) / (t1 - t0)
+        w = w0 + (w1 - w0) * weight
+        w = np.where(T < nodes[0], w_k[0] * T / nodes[0], w)
+        w = np.where(T > nodes[-1], w_k[-1] * T / nodes[-1], w)
+        return np.where(valid, w, np.nan)
+
+    def iv_at(self, K, T) -> np.ndarray:
+        """查询隐含波动率 sigma(K, T)"""
+        T = np.asarray(T, dtype=float)
+        w = self.total_variance_at(K, T)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(T > 0, np.sqrt(np.maximum(w, 0.0) / T), np.nan)
+
+    def to_npz(self, path: str, key: str) -> None:
+        np.savez(
+            path,
+            version=CACHE_VERSION,
+            key=key,
+            k_grid=self.k_grid,
+            expiry_T=self.expiry_T,
+            total_variance=self.total_variance,
+            spot=self.spot,
+            r=self.r,
+        )
+
+    @classmethod
+    def from_npz(cls, path: str, key: Optional[str] = None) -> Optional["VolSurface"]:
+        """读取缓存；版本或 key 不一致时返回 None"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != CACHE_VERSION:
+                return None
+            if key is not None and str(data["key"]) != key:
+                return None
+            return cls(
+                data["k_grid"],
+                data["expiry_T"],
+                data["total_variance"],
+                float(data["spot"]),
+                float(data["r"]),
+            )
+
+
+def _snapshot_digest(path: str) -> str:
+    try:
+        return load_checksum(path)
+    except FileNotFoundError:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(8192), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+
+def surface_cache_key(snapshot_paths: Sequence[str], r: float, iv_source: str) -> str:
+    """缓存 key：快照 sha256 + 拟合参数"""
+    digests = [_snapshot_digest(path) for path in sorted(snapshot_paths)]
+    payload = "|".join(digests + [f"r={r}", f"iv={iv_source}", f"v={CACHE_VERSION}"])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_or_build_surface(
+    snapshot_paths: Sequence[str],
+    r: float = 0.02,
+    recompute_iv: bool = False,
+    use_cache: bool = True,
+) -> VolSurface:
+    """
+    读取或构建快照曲面（同一 run 的多个到期快照合并为一张曲面）
+
+    参数:
+        snapshot_paths: 快照文件路径（capture_t0/t5 每个到期一个文件）
+        r: 无风险利率
+        recompute_iv: True 时按 mid_else_last 价格重新反解 IV，否则用快照 iv 列
+        use_cache: 是否读写快照旁的 ivsurface_<sha>.npz 缓存
+    """
+    if isinstance(snapshot_paths, str):
+        snapshot_paths = [snapshot_paths]
+    iv_source = "mid_else_last" if recompute_iv else "snapshot"
+    key = surface_cache_key(snapshot_paths, r, iv_source)
+    cache_path = os.path.join(
+        os.path.dirname(snapshot_paths[0]), f"ivsurface_{key[:16]}.npz"
+    )
+    if use_cache and os.path.exists(cache_path):
+        surface = VolSurface.from_npz(cache_path, key=key)
+        if surface is not None:
+            return surface
+
+    snapshots: List[Dict[str, object]] = [load_snapshot(p) for p in snapshot_paths]
+    spot = float(snapshots[0]["spot"])
+    as_of = snapshots[0].get("timestamp")
+    chain_df = pd.concat([snap["chain"] for snap in snapshots], ignore_index=True)
+    iv_col = "iv"
+    if recompute_iv:
+        chain_df = solve_chain_iv(chain_df, spot, as_of, r=r)
+        iv_col = "iv_solved"
+
+    surface = VolSurface.from_chain(chain_df, spot, as_of, r=r, iv_col=iv_col)
+    if use_cache:
+        surface.to_npz(cache_path, key)
+    return surface
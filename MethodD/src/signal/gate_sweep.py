@@ -0,0 +1,192 @@
+"""
+三重门控阈值网格扫描：特征列与阈值数组广播，一次评估成千上万组配置
+
+每组配置输出门控通过率、信号 / 可交易 run 数，以及信号方向对各目标的
+Spearman IC 与命中率。配置轴按块处理，单块布尔矩阵大小受 max_cells 约束
+
+注：compute_triple_gate_signal 中 bb_pos_thr 只参与未使用的 bb_long / bb_short，
+不影响信号，因此不作为扫描维度
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.signal.signal_policy import (
+    TripleGateConfig,
+    triple_gate_direction_masks,
+    triple_gate_features,
+)
+
+
+SWEEP_TARGETS = ("iv_change", "spot_return_5d")
+DEFAULT_MAX_CELLS = 1 << 24
+
+
+def build_threshold_grid(
+    iv_thrs: Sequence[float],
+    ma_thrs: Sequence[float],
+    bb_bw_thrs: Optional[Sequence[float]] = None,
+) -> pd.DataFrame:
+    """
+    阈值笛卡尔积
+
+    参数:
+        bb_bw_thrs: 为 None 时不启用带宽过滤
+
+    返回:
+        DataFrame: iv_thr / ma_thr / bb_bw_thr / use_bb_bw_filter
+    """
+    use_filter = bb_bw_thrs is not None
+    bw_values = list(bb_bw_thrs) if use_filter else [TripleGateConfig.bb_bw_thr]
+    iv_grid, ma_grid, bw_grid = np.meshgrid(
+        np.asarray(iv_thrs, dtype=float),
+        np.asarray(ma_thrs, dtype=float),
+        np.asarray(bw_values, dtype=float),
+        indexing="ij",
+    )
+    return pd.DataFrame(
+        {
+            "iv_thr": iv_grid.ravel(),
+            "ma_thr": ma_grid.ravel(),
+            "bb_bw_thr": bw_grid.ravel(),
+            "use_bb_bw_filter": use_filter,
+        }
+    )
+
+
+def _target_stats(target: np.ndarray) -> Dict[str, np.ndarray]:
+    """目标列的预处理：有效掩码、去均值秩、正负号"""
+    valid = np.isfinite(target)
+    ranks = np.zeros(len(target))
+    ranks[valid] = stats.rankdata(target[valid])
+    n_valid = int(valid.sum())
+    ranks[valid] -= (n_valid + 1) / 2
+    return {
+        "valid": valid.astype(np.float64),
+        "ranks": ranks,
+        "pos": (valid & (target > 0)).astype(np.float64),
+        "neg": (valid & (target < 0)).astype(np.float64),
+        "n": n_valid,
+        "rank_ss": float(np.dot(ranks, ranks)),
+    }
+
+
+def _ternary_spearman(
+    long_mask: np.ndarray, short_mask: np.ndarray, target: Dict[str, np.ndarray]
+) -> np.ndarray:
+    """
+    signal_side（-1/0/1）与目标的 Spearman 相关，逐配置计算
+
+    三值信号的平均秩只取决于各组样本数，协方差只需各组目标秩之和，
+    因此整块配置只需几次矩阵乘法
+    """
+    n = target["n"]
+    n_pos = long_mask @ target["valid"]
+    n_neg = short_mask @ target["valid"]
+    n_zero = n - n_pos - n_neg
+    center = (n + 1) / 2
+    rank_neg = (n_neg + 1) / 2 - center
+    rank_zero = n_neg + (n_zero + 1) / 2 - center
+    rank_pos = n_neg + n_zero + (n_pos + 1) / 2 - center
+
+    sum_pos = long_mask @ target["ranks"]
+    sum_neg = short_mask @ target["ranks"]
+    sum_zero = -sum_pos - sum_neg
+    cov = rank_pos * sum_pos + rank_neg * sum_neg + rank_zero * sum_zero
+    signal_ss = n_pos * rank_pos**2 + n_neg * rank_neg**2 + n_zero * rank_zero**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ic = cov / np.sqrt(signal_ss * target["rank_ss"])
+    return np.where((signal_ss > 0) & (target["rank_ss"] > 0) & (n >= 3), ic, np.nan)
+
+
+def sweep_triple_gate(
+    run_df: pd.DataFrame,
+    grid: pd.DataFrame,
+    targets: Sequence[str] = SWEEP_TARGETS,
+    tradable_col: str = "is_tradable",
+    max_cells: int = DEFAULT_MAX_CELLS,
+) -> pd.DataFrame:
+    """
+    在 run 级表上批量评估阈值网格
+
+    参数:
+        run_df: run 级 DataFrame（列同 apply_triple_gate_signals，另含目标列与 is_tradable）
+        grid: build_threshold_grid 的结果（iv_thr / ma_thr / bb_bw_thr / use_bb_bw_filter）
+        targets: 目标列名（缺失的列跳过）
+        tradable_col: run 是否可交易的布尔列（缺失时视为全部可交易）
+        max_cells: 单块 (配置数 × run 数) 上限，控制内存
+
+    返回:
+        DataFrame: grid 各列 + pass_rate / n_signal / n_long / n_short / n_tradable，
+        以及每个目标的 ic_<target>（signal_side 与目标的 Spearman IC）/
+        hit_<target>（有信号的 run 中方向与目标同号的比例）/ n_<target>
+    """
+    features = triple_gate_features(run_df)
+    long_dir, short_dir = triple_gate_direction_masks(features)
+    iv_signal = features["iv_signal"]
+    ma_break = features["ma_break"]
+    bb_bw = features["bb_bw"]
+
+    n_runs = len(run_df)
+    if tradable_col in run_df.columns:
+        tradable = run_df[tradable_col].fillna(False).astype(bool).to_numpy()
+    else:
+        tradable = np.ones(n_runs, dtype=bool)
+    tradable = tradable.astype(np.float64)
+    target_stats = {
+        name: _target_stats(
+            pd.to_numeric(run_df[name], errors="coerce").to_numpy(
+                dtype=float, na_value=np.nan
+            )
+        )
+        for name in targets
+        if name in run_df.columns
+    }
+
+    iv_thr = grid["iv_thr"].to_numpy(dtype=float)
+    ma_thr = grid["ma_thr"].to_numpy(dtype=float)
+    bw_thr = grid["bb_bw_thr"].to_numpy(dtype=float)
+    use_filter = grid["use_bb_bw_filter"].to_numpy(dtype=bool)
+
+    n_configs = len(grid)
+    chunk = max(1, max_cells // max(n_runs, 1))
+    columns = ["n_signal", "n_long", "n_short", "n_tradable"]
+    for name in target_stats:
+        columns += [f"ic_{name}", f"hit_{name}", f"n_{name}"]
+    out = {name: np.empty(n_configs) for name in columns}
+
+    for start in range(0, n_configs, chunk):
+        rows = slice(start, min(start + chunk, n_configs))
+        gate = iv_signal[None, :] >= iv_thr[rows, None]
+        gate &= ~use_filter[rows, None] | (bb_bw[None, :] >= bw_thr[rows, None])
+        long_mask = gate & long_dir & (ma_break[None, :] >= ma_thr[rows, None])
+        short_mask = (
+            gate & short_dir & (ma_break[None, :] <= -ma_thr[rows, None]) & ~long_mask
+        )
+        long_f = long_mask.astype(np.float64)
+        short_f = short_mask.astype(np.float64)
+        signal_f = long_f + short_f
+
+        out["n_long"][rows] = long_f.sum(axis=1)
+        out["n_short"][rows] = short_f.sum(axis=1)
+        out["n_signal"][rows] = signal_f.sum(axis=1)
+        out["n_tradable"][rows] = signal_f @ tradable
+        for name, target in target_stats.items():
+            n_flagged = signal_f @ target["valid"]
+            hits = long_f @ target["pos"] + short_f @ target["neg"]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[f"hit_{name}"][rows] = np.where(
+                    n_flagged > 0, hits / n_flagged, np.nan
+                )
+            out[f"n_{name}"][rows] = n_flagged
+            out[f"ic_{name}"][rows] = _ternary_spearman(long_f, short_f, target)
+
+    result = grid.reset_index(drop=True).copy()
+    result["pass_rate"] = out["n_signal"] / n_runs if n_runs else np.nan
+    for name in columns:
+        values = out[name]
+        result[name] = values.astype(np.int64) if name.startswith("n_") else values
+    return result
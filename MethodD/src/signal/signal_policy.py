@@ -125,6 +125,80 @@ def compute_triple_gate_signal(row: pd.Series, config: TripleGateConfig) -> pd.S
     return pd.Series({"signal_flag": 0, "signal_side": 0})
 
 
+def _numeric_column(run_df: pd.DataFrame, name: str) -> np.ndarray:
+    """列转 float 数组（缺列或无法解析时为 NaN）"""
+    if name not in run_df.columns:
+        return np.full(len(run_df), np.nan)
+    values = pd.to_numeric(run_df[name], errors="coerce")
+    return values.to_numpy(dtype=float, na_value=np.nan)
+
+
+def triple_gate_features(run_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    取出三重门控用到的列（float 数组）
+
+    IV 列的选取与 compute_triple_gate_signal 相同：有 iv_signal_median10 列就用它，
+    否则退回 iv_signal
+    """
+    iv_col = (
+        "iv_signal_median10" if "iv_signal_median10" in run_df.columns else "iv_signal"
+    )
+    return {
+        "iv_signal": _numeric_column(run_df, iv_col),
+        "ma_break": _numeric_column(run_df, "ma200_break_t0"),
+        "bb_bw": _numeric_column(run_df, "bb_bw_t0"),
+        "macd_cross": _numeric_column(run_df, "macd_cross_flag"),
+        "bb_mid_flag": _numeric_column(run_df, "bb_midline_break_flag"),
+        "bb_break_side": _numeric_column(run_df, "bb_break_side"),
+    }
+
+
+def _int_equals(values: np.ndarray, target: int) -> np.ndarray:
+    """逐元素的 int(x) == target（向零取整），NaN 为 False"""
+    return np.trunc(values) == target
+
+
+def triple_gate_direction_masks(
+    features: Dict[str, np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """与阈值无关的方向条件：MACD 交叉与 BB 中线突破（多 / 空）"""
+    bb_mid_ok = _int_equals(features["bb_mid_flag"], 1)
+    side = features["bb_break_side"]
+    long_mask = (
+        _int_equals(features["macd_cross"], 1) & bb_mid_ok & _int_equals(side, 1)
+    )
+    short_mask = (
+        _int_equals(features["macd_cross"], -1) & bb_mid_ok & _int_equals(side, -1)
+    )
+    return long_mask, short_mask
+
+
+def compute_triple_gate_arrays(
+    run_df: pd.DataFrame, config: TripleGateConfig
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    三重门控的列向量化版本：所有条件按列算成布尔掩码
+
+    与逐行 compute_triple_gate_signal 的结果一致（NaN 比较为 False，
+    标记列按 int() 截断后比较）
+
+    返回:
+        Tuple: (signal_flag, signal_side)，均为 int8 数组
+    """
+    features = triple_gate_features(run_df)
+    long_dir, short_dir = triple_gate_direction_masks(features)
+    ma_break = features["ma_break"]
+    gate = features["iv_signal"] >= config.iv_thr
+    if config.use_bb_bw_filter:
+        gate &= features["bb_bw"] >= config.bb_bw_thr
+    long_cond = gate & long_dir & (ma_break >= config.ma_thr)
+    short_cond = gate & short_dir & (ma_break <= -config.ma_thr) & ~long_cond
+
+    signal_flag = (long_cond | short_cond).astype(np.int8)
+    signal_side = long_cond.astype(np.int8) - short_cond.astype(np.int8)
+    return signal_flag, signal_side
+
+
 def apply_triple_gate_signals(
     run_df: pd.DataFrame, config: TripleGateConfig
 ) -> pd.DataFrame:
@@ -136,12 +210,14 @@ def apply_triple_gate_signals(
         config: TripleGateConfig
 
     返回:
-        DataFrame: signal_flag, signal_side
+        DataFrame: signal_flag, signal_side（int8，索引同 run_df）
     """
     if run_df is None or run_df.empty:
         return pd.DataFrame(columns=["signal_flag", "signal_side"])
-    signals = run_df.apply(lambda row: compute_triple_gate_signal(row, config), axis=1)
-    return signals
+    signal_flag, signal_side = compute_triple_gate_arrays(run_df, config)
+    return pd.DataFrame(
+        {"signal_flag": signal_flag, "signal_side": signal_side}, index=run_df.index
+    )
 
 
 class EarningsWindowFilter:
@@ -167,15 +243,18 @@ class EarningsWindowFilter:
             Series: 过滤后的信号
         """
         filtered_signal = signal_series.copy()
-
-        for earnings_date in earnings_dates:
-            # 财报前 3 日 + 后 2 日
-            start = earnings_date - pd.Timedelta(days=pre_days)
-            end = earnings_date + pd.Timedelta(days=post_days)
-
-            # 在这个窗口内设置信号为 0
-            mask = (filtered_signal.index >= start) & (filtered_signal.index <= end)
-            filtered_signal[mask] = 0
+        if len(earnings_dates) == 0:
+            return filtered_signal
+
+        # d 落在某个 [e - pre, e + post] 内 <=> [d - post, d + pre] 内有财报日 e
+        earnings = pd.DatetimeIndex(earnings_dates).sort_values()
+        index = pd.DatetimeIndex(filtered_signal.index)
+        pos = earnings.searchsorted(index - pd.Timedelta(days=post_days), side="left")
+        candidate = earnings[np.minimum(pos, len(earnings) - 1)]
+        mask = (pos < len(earnings)) & (
+            candidate <= index + pd.Timedelta(days=pre_days)
+        )
+        filtered_signal[mask] = 0
 
         return filtered_signal
 
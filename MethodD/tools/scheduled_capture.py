@@ -5,17 +5,36 @@
 
 import argparse
 import json
-from datetime import datetime, timezone
+import sys
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, List, Optional
 
 import pandas as pd
+import yfinance as yf
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from capture_snapshots import capture_t0, capture_t5
+from src.factor.factor_state import (
+    IVFactorState,
+    load_factor_states,
+    save_factor_states,
+)
+from src.factor.indicator_state import (
+    PriceIndicatorState,
+    load_indicator_states,
+    save_indicator_states,
+)
+from src.factor.price_factors import INDICATOR_DEFAULTS
 
 
 RUNS_DIR = Path("data/snapshots/runs")
 INDEX_PATH = RUNS_DIR / "index.csv"
+FACTOR_STATE_PATH = RUNS_DIR / "factor_state.json"
+FACTOR_WINDOW = 10
+INDICATOR_STATE_PATH = RUNS_DIR / "indicator_state.json"
+INDICATOR_LOOKBACK_DAYS = 400
 INDEX_COLUMNS = [
     "run_id",
     "ticker",
@@ -25,6 +44,14 @@ INDEX_COLUMNS = [
     "t5_status",
     "note",
     "last_checked_utc",
+    "iv_atm_t0",
+    "factor_a_t0",
+    "factor_b_t0",
+    "bb_pos_t0",
+    "bb_bw_t0",
+    "ma200_break_t0",
+    "macd_cross_flag_t0",
+    "bb_mid_side_t0",
 ]
 
 
@@ -77,9 +104,9 @@ def _upsert_index(df: pd.DataFrame, record: Dict[str, object]) -> pd.DataFrame:
         return pd.DataFrame([record], columns=INDEX_COLUMNS)
     run_id = record.get("run_id")
     if run_id in df["run_id"].values:
-        df.loc[df["run_id"] == run_id, INDEX_COLUMNS] = [
-            record.get(col) for col in INDEX_COLUMNS
-        ]
+        # 只覆盖 record 中给出的列（t5 回填不会清掉 t0 时写入的因子值）
+        columns = [col for col in INDEX_COLUMNS if col in record]
+        df.loc[df["run_id"] == run_id, columns] = [record[col] for col in columns]
         return df
     return pd.concat(
         [df, pd.DataFrame([record], columns=INDEX_COLUMNS)], ignore_index=True
@@ -102,8 +129,95 @@ def _scan_manifests() -> List[Dict[str, object]]:
     return manifests
 
 
+def _atm_iv_from_manifest(run_id: str, manifest: Dict[str, object]) -> Optional[float]:
+    """从主到期快照中读出 contract_key 对应 ATM call 的 IV"""
+    contract_key = manifest.get("contract_key") or {}
+    symbol = contract_key.get("contractSymbol")
+    t0_map = (manifest.get("snapshots") or {}).get("t0") or {}
+    for expiry in manifest.get("expiries") or []:
+        snap_name = t0_map.get(str(expiry))
+        if not snap_name:
+            continue
+        snapshot = _load_manifest(RUNS_DIR / run_id / snap_name) or {}
+        for row in snapshot.get("chain") or []:
+            if row.get("contractSymbol") == symbol:
+                iv = row.get("iv")
+                return float(iv) if iv is not None else None
+    return None
+
+
+def _download_daily_bars(ticker: str, start: date, end: date) -> Optional[pd.DataFrame]:
+    """下载 [start, end] 的日线（Date / Close，可选 High / Low）"""
+    history = yf.download(
+        ticker,
+        start=start.isoformat(),
+        end=(end + timedelta(days=1)).isoformat(),
+        progress=False,
+        auto_adjust=False,
+    )
+    if history is None or history.empty:
+        return None
+    if isinstance(history.columns, pd.MultiIndex):
+        history.columns = [item[0] for item in history.columns]
+    history = history.reset_index()
+    if "Close" not in history.columns:
+        return None
+    history["Date"] = pd.to_datetime(history["Date"]).dt.strftime("%Y-%m-%d")
+    return history.dropna(subset=["Close"]).sort_values("Date")
+
+
+def _feed_bar(state: PriceIndicatorState, bar: pd.Series) -> None:
+    state.update(bar["Close"], bar.get("High"), bar.get("Low"), date=bar["Date"])
+
+
+def _indicators_at_t0(
+    symbol: str, states: Dict[str, PriceIndicatorState], t0_iso: str
+) -> Dict[str, object]:
+    """
+    增量更新价格指标状态，返回 t0 当天的指标
+
+    只把 t0 之前已收盘的日线写入状态；t0 当天（可能未收盘）的 K 线只在状态副本上
+    计算，与 lookup_indicators 的 as-of 口径一致，又不会把盘中价格固化进状态
+    """
+    t0_date = (
+        pd.to_datetime(t0_iso).date() if t0_iso else datetime.now(timezone.utc).date()
+    )
+    state = states.get(symbol)
+    if state is None or state.last_date is None:
+        start = t0_date - timedelta(days=INDICATOR_LOOKBACK_DAYS)
+    else:
+        start = date.fromisoformat(state.last_date) + timedelta(days=1)
+    try:
+        bars = (
+            _download_daily_bars(symbol, start, t0_date) if start <= t0_date else None
+        )
+    except Exception as exc:
+        print(f"[WARN] 日线下载失败 {symbol}: {exc}")
+        bars = None
+    if state is None:
+        if bars is None:
+            return dict(INDICATOR_DEFAULTS)
+        has_high_low = "High" in bars.columns and "Low" in bars.columns
+        state = states.setdefault(
+            symbol, PriceIndicatorState(use_high_low=has_high_low)
+        )
+
+    scored = state
+    if bars is not None:
+        t0_key = t0_date.isoformat()
+        for _, bar in bars[bars["Date"] < t0_key].iterrows():
+            _feed_bar(state, bar)
+        today = bars[bars["Date"] == t0_key]
+        if not today.empty:
+            scored = PriceIndicatorState.from_dict(state.to_dict())
+            _feed_bar(scored, today.iloc[-1])
+    return scored.last_values or dict(INDICATOR_DEFAULTS)
+
+
 def run_t0_capture(tickers: List[str], dry_run: bool) -> List[Dict[str, object]]:
     records = []
+    states = load_factor_states(str(FACTOR_STATE_PATH))
+    indicator_states = load_indicator_states(str(INDICATOR_STATE_PATH))
     for ticker in tickers:
         if dry_run:
             print(f"[DRY-RUN] t0 capture {ticker}")
@@ -112,17 +226,34 @@ def run_t0_capture(tickers: List[str], dry_run: bool) -> List[Dict[str, object]]
         manifest_path = RUNS_DIR / run_id / "manifest.json"
         manifest = _load_manifest(manifest_path) or {}
         due_date = _calc_t5_due_date(manifest.get("captured_at_t0_utc", ""))
+        symbol = manifest.get("ticker", ticker).upper()
+        state = states.setdefault(symbol, IVFactorState(window=FACTOR_WINDOW))
+        factor = state.update(_atm_iv_from_manifest(run_id, manifest))
+        indicators = _indicators_at_t0(
+            symbol, indicator_states, manifest.get("captured_at_t0_utc") or ""
+        )
         record = {
             "run_id": run_id,
-            "ticker": manifest.get("ticker", ticker).upper(),
+            "ticker": symbol,
             "captured_at_t0_utc": manifest.get("captured_at_t0_utc"),
             "t5_due_date": due_date,
             "captured_at_t5_utc": manifest.get("captured_at_t5_utc"),
             "t5_status": "pending",
             "note": "",
             "last_checked_utc": _utc_now_iso(),
+            "iv_atm_t0": factor["iv"],
+            "factor_a_t0": factor["factor_a"],
+            "factor_b_t0": factor["factor_b"],
+            "bb_pos_t0": indicators["bb_pos"],
+            "bb_bw_t0": indicators["bb_bw"],
+            "ma200_break_t0": indicators["ma200_break"],
+            "macd_cross_flag_t0": indicators["macd_cross_flag"],
+            "bb_mid_side_t0": indicators["bb_mid_side"],
         }
         records.append(record)
+    if not dry_run:
+        save_factor_states(states, str(FACTOR_STATE_PATH))
+        save_indicator_states(indicator_states, str(INDICATOR_STATE_PATH))
     return records
 
 